@@ -1,32 +1,57 @@
-from flask import Flask, request, render_template_string, send_file
-import yfinance as yf
-from prophet import Prophet
+from flask import Flask, request, render_template, jsonify, Response, session, send_from_directory
+from werkzeug.utils import secure_filename
 import plotly.graph_objs as go
 import pandas as pd
+import numpy as np
 from datetime import date
-import io
 import uuid
+import hashlib
+import logging
 import os
-import plotly.io as pio
+import time
+import market_data
+import price_store
+import warmup
+from chart_payload import figure_html, trace_data
+from compression import compress_response
+from engines import DEFAULT_ENGINE, ENGINES, get_engine, horizon_days, training_frame
+from export import EXPORT_FORMATS, iter_export
+from forecast_executor import EXECUTOR
+from forecast_store import FORECAST_STORE, CompactForecast
+from image_renderer import FAILED, IMAGE_RENDERER, READY
+from intervals import DEFAULT_INTERVAL_MODE, INTERVAL_MODES, validate_mode
+from jobs import JOBS, sse_stream
+from price_cache import PRICE_CACHE
+from scheduler import PrecomputeScheduler
+from singleflight import SingleFlight
+from static_assets import STATIC_ASSETS
+from stocks import POPULAR_STOCKS
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-
-# Temporary storage for forecast data
-FORECAST_STORAGE = {}
-
-# List of popular Indian stocks for dropdown and suggestions
-POPULAR_STOCKS = {
-    "Reliance Industries": "RELIANCE",
-    "Tata Consultancy Services": "TCS",
-    "Infosys": "INFY",
-    "HDFC Bank": "HDFCBANK",
-    "ICICI Bank": "ICICIBANK",
-    "Wipro": "WIPRO",
-    "Bharti Airtel": "BHARTIARTL",
-    "Asian Paints": "ASIANPAINT",
-    "Hindustan Unilever": "HINDUNILVR",
-    "Bajaj Finance": "BAJFINANCE"
-}
+# Signs the session cookie that scopes stored forecasts to one browser. Must be set and shared by
+# every worker in production; the random fallback only suits a single development process.
+app.secret_key = os.environ.get("FLASK_SECRET_KEY")
+if not app.secret_key:
+    logger.warning(
+        "FLASK_SECRET_KEY is not set; using a random key, so sessions (and the downloads they own) "
+        "break on restart and are not shared between worker processes")
+    app.secret_key = os.urandom(32)
+app.jinja_env.globals["asset_url"] = STATIC_ASSETS.url
+# gzip or brotli for HTML and JSON, negotiated per request
+app.after_request(compress_response)
+
+# Concurrent requests for the same ticker share one data load and one Prophet fit
+INFLIGHT = SingleFlight()
+INTERVAL_WIDTH = 0.8
+
+# Interval modes offered in the form, fastest first
+INTERVAL_MODE_LABELS = [
+    ("analytic", "Fast (approximate)"),
+    ("reduced", "Reduced sampling"),
+    ("sampled", "Full sampling (slowest)"),
+]
 
 # HTML template with updated design
 HTML_TEMPLATE = """
@@ -39,154 +64,7 @@ HTML_TEMPLATE = """
     <script src="https://cdn.tailwindcss.com"></script>
     <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
     <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap" rel="stylesheet">
-    <style>
-        body {
-            font-family: 'Poppins', sans-serif;
-            background: linear-gradient(135deg, #0a1733, #000000);
-            color: #ffffff;
-            min-height: 100vh;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            padding: 1rem;
-        }
-        .container {
-            max-width: 1200px;
-            width: 100%;
-        }
-        .card {
-            background: rgba(255, 255, 255, 0.05);
-            backdrop-filter: blur(10px);
-            border-radius: 1rem;
-            padding: 2rem;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            transition: transform 0.3s ease;
-        }
-        .card:hover {
-            transform: translateY(-5px);
-        }
-        .glow-input, .glow-select {
-            background: #1e293b;
-            border: 2px solid rgba(255, 255, 255, 0.1);
-            border-radius: 0.5rem;
-            padding: 0.75rem;
-            color: #ffffff;
-            transition: border-color 0.3s ease, box-shadow 0.3s ease;
-        }
-        .glow-input:focus, .glow-select:focus {
-            border-color: #3b82f6;
-            box-shadow: 0 0 10px rgba(59, 130, 246, 0.5);
-            outline: none;
-        }
-        .glow-select option {
-            background: #1e293b;
-            color: #ffffff;
-        }
-        .glow-button {
-            background: linear-gradient(90deg, #3b82f6, #0a1733);
-            border: none;
-            border-radius: 0.5rem;
-            padding: 0.75rem 1.5rem;
-            color: white;
-            font-weight: 600;
-            cursor: pointer;
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }
-        .glow-button:hover {
-            transform: scale(1.05);
-            box-shadow: 0 0 15px rgba(59, 130, 246, 0.7);
-        }
-        .glow-button:disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-            transform: none;
-            box-shadow: none;
-        }
-        .spinner {
-            border: 4px solid rgba(255, 255, 255, 0.2);
-            border-top: 4px solid #3b82f6;
-            border-radius: 50%;
-            width: 32px;
-            height: 32px;
-            animation: spin 1s linear infinite;
-            margin: 1rem auto;
-            display: none;
-        }
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-        .fade-in {
-            animation: fadeIn 0.5s ease-in;
-        }
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(20px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        .invalid {
-            border-color: #ef4444 !important;
-            box-shadow: 0 0 10px rgba(239, 68, 68, 0.5);
-        }
-        .plotly .hoverlayer .hovertext {
-            background-color: rgba(0, 0, 0, 0.9) !important;
-            color: white !important;
-            border: 2px solid #3b82f6 !important;
-            padding: 10px !important;
-            font-family: 'Poppins', sans-serif !important;
-            font-size: 13px !important;
-            z-index: 10000 !important;
-        }
-        .plotly .hoverlayer .spike {
-            stroke: #3b82f6 !important;
-        }
-        .light .plotly .hoverlayer .hovertext {
-            background-color: rgba(255, 255, 255, 0.95) !important;
-            color: #0a1733 !important;
-            border: 2px solid #3b82f6 !important;
-        }
-        .theme-toggle {
-            position: relative;
-            width: 60px;
-            height: 34px;
-        }
-        .theme-toggle input {
-            opacity: 0;
-            width: 0;
-            height: 0;
-        }
-        .slider {
-            position: absolute;
-            cursor: pointer;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: rgba(255, 255, 255, 0.2);
-            transition: 0.4s;
-            border-radius: 34px;
-        }
-        .slider:before {
-            position: absolute;
-            content: "";
-            height: 26px;
-            width: 26px;
-            left: 4px;
-            bottom: 4px;
-            background: url('data:image/svg+xml;utf8,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="%23ffffff" stroke-width="2"><path d="M12 3v1m0 16v1m9-9h-1M4 12H3m15.364 6.364l-.707-.707M6.343 6.343l-.707-.707m12.728 0l-.707.707M6.343 17.657l-.707.707M16 12a4 4 0 11-8 0 4 4 0 018 0z"/></svg>') no-repeat center;
-            background-size: 20px;
-            transition: 0.4s;
-            border-radius: 50%;
-        }
-        input:checked + .slider {
-            background: rgba(59, 130, 246, 0.5);
-        }
-        input:checked + .slider:before {
-            transform: translateX(26px);
-            background: url('data:image/svg+xml;utf8,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="%230a1733"><path d="M20.354 15.354A9 9 0 018.646 3.646 9.003 9.003 0 0012 21a9.003 9.003 0 008.354-5.646z"/></svg>') no-repeat center;
-            background-size: 20px;
-        }
-    </style>
+    <link href="{{ asset_url('app.css') }}" rel="stylesheet">
 </head>
 <body class="dark">
     <div class="container mx-auto">
@@ -239,6 +117,22 @@ HTML_TEMPLATE = """
                         </select>
                     </div>
                 </div>
+                <div>
+                    <label for="engine" class="block text-sm font-medium text-gray-200">Forecast Engine</label>
+                    <select id="engine" name="engine" class="glow-select w-full mt-2">
+                        {% for option in engines %}
+                            <option value="{{ option.name }}" {% if option.name == engine %}selected{% endif %}>{{ option.label }}</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <div>
+                    <label for="interval_mode" class="block text-sm font-medium text-gray-200">Confidence Interval</label>
+                    <select id="interval_mode" name="interval_mode" class="glow-select w-full mt-2">
+                        {% for mode, label in interval_modes %}
+                            <option value="{{ mode }}" {% if mode == interval_mode %}selected{% endif %}>{{ label }}</option>
+                        {% endfor %}
+                    </select>
+                </div>
                 <button type="submit" id="submitBtn" class="glow-button w-full sm:w-auto">Generate Forecast</button>
             </form>
             <div id="spinner" class="spinner"></div>
@@ -276,67 +170,222 @@ HTML_TEMPLATE = """
                 <div class="flex space-x-4 mt-4">
                     <a href="/download?ticker={{ stock_info.ticker }}&forecast_id={{ forecast_id }}"
                        class="glow-button">Download Forecast (CSV)</a>
-                    <p class="text-gray-300">Graph saved as {{ image_path }}</p>
+                    <p class="text-gray-300">Also as
+                        <a class="underline" href="/download?ticker={{ stock_info.ticker }}&forecast_id={{ forecast_id }}&format=parquet">Parquet</a>,
+                        <a class="underline" href="/download?ticker={{ stock_info.ticker }}&forecast_id={{ forecast_id }}&format=arrow">Arrow</a> or
+                        <a class="underline" href="/download?ticker={{ stock_info.ticker }}&forecast_id={{ forecast_id }}&format=json">JSON</a></p>
+                    <p class="text-gray-300">Graph saved as <a class="underline" href="/images/{{ image_path }}" target="_blank">{{ image_path }}</a></p>
                 </div>
             </div>
         {% endif %}
     </div>
-    <script>
-        // Theme toggle
-        const themeToggle = document.getElementById('themeToggle');
-        const body = document.body;
-        if (localStorage.getItem('theme') === 'light') {
-            body.classList.remove('dark');
-            body.classList.add('light');
-            themeToggle.checked = true;
-        }
-        themeToggle.addEventListener('change', () => {
-            body.classList.toggle('dark');
-            body.classList.toggle('light');
-            localStorage.setItem('theme', body.classList.contains('light') ? 'light' : 'dark');
-            document.getElementById('stockForm').elements['theme'].value = body.classList.contains('light') ? 'light' : 'dark';
-        });
-
-        // Form validation and loading spinner
-        const form = document.getElementById('stockForm');
-        const tickerInput = document.getElementById('ticker');
-        const submitBtn = document.getElementById('submitBtn');
-        const spinner = document.getElementById('spinner');
-        const periodType = document.getElementById('period_type');
-        const periodDays = document.getElementById('period_days');
-        const periodMonths = document.getElementById('period_months');
-        const periodYears = document.getElementById('period_years');
-
-        function togglePeriodInput() {
-            periodDays.style.display = periodType.value === 'days' ? 'block' : 'none';
-            periodMonths.style.display = periodType.value === 'months' ? 'block' : 'none';
-            periodYears.style.display = periodType.value === 'years' ? 'block' : 'none';
-        }
-
-        togglePeriodInput();
-
-        tickerInput.addEventListener('input', () => {
-            tickerInput.classList.toggle('invalid', !tickerInput.value.trim());
-        });
-
-        form.addEventListener('submit', (e) => {
-            if (!tickerInput.value.trim()) {
-                e.preventDefault();
-                tickerInput.classList.add('invalid');
-                tickerInput.focus();
-            } else {
-                submitBtn.disabled = true;
-                spinner.style.display = 'block';
-            }
-        });
-    </script>
+    <script src="{{ asset_url('app.js') }}"></script>
 </body>
 </html>
 """
 
+# Parsed and compiled once; render_template_string would recompile the page on every request
+PAGE_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+TRAINING_START = "2018-01-01"
+# Bumped whenever the GET /api/forecast payload changes shape, so clients' cached ETags stop matching
+API_VERSION = 1
+API_MAX_HORIZON = 4 * 365
+
+# Horizons precomputed after market close, as (period_type, period_value)
+STANDARD_HORIZONS = [("days", 30), ("months", 3), ("months", 6), ("years", 1), ("years", 2), ("years", 4)]
+
+# Load price history and company info for a ticker
+def load_stock_data(ticker):
+    data = PRICE_CACHE.get(ticker, start=TRAINING_START)
+    if data.empty:
+        raise ValueError(f"No data found for stock symbol {ticker}")
+
+    info = market_data.PROVIDER.info(ticker)
+    stock_info = {
+        "ticker": ticker,
+        "name": info.get("longName", ticker),
+        "price": f"{info.get('regularMarketPrice', 'N/A')} {info.get('currency', '')}",
+        "market_cap": f"{info.get('marketCap', 'N/A') / 1e9:.2f}B {info.get('currency', '')}" if isinstance(info.get('marketCap'), (int, float)) else "N/A",
+        "sector": info.get("sector", "N/A")
+    }
+    return data, stock_info
+
+# Fit once per (ticker, last bar, interval width) in the process pool; concurrent callers
+# share the fit and later requests for any horizon reuse the cached model. Other engines fit
+# inside engine_predict in milliseconds.
+def ensure_model(ticker, df_train, engine=DEFAULT_ENGINE):
+    if engine != "prophet":
+        return
+    data_date = df_train['ds'].iloc[-1]
+    INFLIGHT.do(("fit", ticker, data_date, INTERVAL_WIDTH), EXECUTOR.fit, ticker, df_train, INTERVAL_WIDTH)
+
+# Forecast frames for each period; Prophet predicts in the process pool, other engines inline
+def engine_predict(engine, ticker, df_train, periods, interval_mode):
+    if engine == "prophet":
+        return EXECUTOR.predict(ticker, df_train, INTERVAL_WIDTH, periods, interval_mode)
+    forecast, history_rows = get_engine(engine).forecast(ticker, df_train, max(periods), INTERVAL_WIDTH, interval_mode)
+    return {period: forecast.iloc[:history_rows + period] for period in periods}
+
+def to_forecast_data(forecast):
+    forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+    forecast_data.columns = ['Date', 'Forecast', 'Lower Bound', 'Upper Bound']
+    return forecast_data
+
+# Traces are downsampled to the chart's pixel width, so long histories cost no more to send or draw
+def build_figure(df_train, forecast, title, theme):
+    fig = go.Figure()
+    history_x, (history_y,) = trace_data(df_train['ds'], df_train['y'])
+    forecast_x, (yhat, yhat_upper, yhat_lower) = trace_data(
+        forecast['ds'], forecast['yhat'], forecast['yhat_upper'], forecast['yhat_lower'])
+
+    fig.add_trace(go.Scatter(
+        x=history_x, y=history_y,
+        mode='lines', name='Historical',
+        line=dict(color='#3b82f6'),
+        hovertemplate='%{y:.2f}<br>%{x|%Y-%m-%d}'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=forecast_x, y=yhat,
+        mode='lines', name='Forecast',
+        line=dict(color='#60a5fa'),
+        hovertemplate='%{y:.2f}<br>%{x|%Y-%m-%d}'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=forecast_x, y=yhat_upper,
+        mode='lines', name='Upper Bound',
+        line=dict(width=0),
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=forecast_x, y=yhat_lower,
+        mode='lines', name='Lower Bound',
+        line=dict(width=0),
+        fill='tonexty',
+        fillcolor='rgba(59, 130, 246, 0.2)',
+        showlegend=True,
+        hovertemplate='Lower: %{y:.2f}<br>%{x|%Y-%m-%d}'
+    ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title='Stock Price',
+        template='plotly_dark' if theme == 'dark' else 'plotly_white',
+        hovermode='x unified',
+        hoverlabel=dict(
+            bgcolor='rgba(0, 0, 0, 0.9)',
+            font=dict(color='white', family='Poppins, sans-serif'),
+            bordercolor='#3b82f6'
+        ),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=60, b=20),
+        font=dict(family="Poppins, sans-serif", color="#ffffff"),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(gridcolor='rgba(255, 255, 255, 0.1)'),
+        yaxis=dict(gridcolor='rgba(255, 255, 255, 0.1)')
+    )
+    return fig
+
+# Queue the plot for PNG export, returning the file name it will be served under from /images
+def save_image(fig, ticker):
+    try:
+        return IMAGE_RENDERER.submit(fig, ticker)
+    except Exception as e:
+        logger.warning(f"Error saving image: {str(e)}")
+        return "Failed to save image"
+
+# Append the session's close bar when the stored history (which only takes complete days) ends before it
+def with_session_bar(ticker, data, session):
+    last = data.index[-1]
+    if last.strftime('%Y-%m-%d') >= session:
+        return data
+    try:
+        fresh = price_store.fetch_bars(ticker, last, session)
+    except Exception as e:
+        logger.warning(f"Could not fetch the {session} close for {ticker}: {str(e)}")
+        return data
+    fresh = fresh[fresh.index > last]
+    return pd.concat([data, fresh]) if not fresh.empty else data
+
+# Fit once and render every standard horizon for both themes; used by the after-market scheduler.
+# Runs on the session's closing bar, so the payload stays valid until the next session closes.
+def precompute_forecasts(ticker, session):
+    timings = {}
+    started = time.perf_counter()
+    data, stock_info = INFLIGHT.do(("load", ticker, date.today()), load_stock_data, ticker)
+    data = with_session_bar(ticker, data, session)
+    df_train = training_frame(data)
+    if df_train.shape[0] < 2:
+        raise ValueError("Not enough data to generate a forecast.")
+    timings["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ensure_model(ticker, df_train, DEFAULT_ENGINE)
+    timings["fit"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    periods = [horizon_days(period_type, period_value) for period_type, period_value in STANDARD_HORIZONS]
+    forecasts = engine_predict(DEFAULT_ENGINE, ticker, df_train, periods, DEFAULT_INTERVAL_MODE)
+    timings["predict"] = time.perf_counter() - started
+
+    results = {}
+    for period_type, period_value in STANDARD_HORIZONS:
+        forecast = forecasts[horizon_days(period_type, period_value)]
+        forecast_data = to_forecast_data(forecast)
+
+        started = time.perf_counter()
+        title = f"{stock_info['name']} Forecast for {period_value} {period_type.capitalize()}"
+        plot_divs = {}
+        for theme in ("dark", "light"):
+            fig = build_figure(df_train, forecast, title, theme)
+            plot_divs[theme] = figure_html(fig)
+        image_path = save_image(fig, ticker)
+        timings["render"] = timings.get("render", 0) + time.perf_counter() - started
+
+        results[(ticker, period_type, period_value, DEFAULT_INTERVAL_MODE, DEFAULT_ENGINE)] = {
+            "data_date": df_train['ds'].iloc[-1],
+            "stock_info": stock_info,
+            "forecast_data": forecast_data,
+            "plot_divs": plot_divs,
+            "image_path": image_path,
+        }
+    return results, timings
+
+PRECOMPUTE = PrecomputeScheduler(
+    precompute_forecasts,
+    [warmup.to_symbol(symbol) for symbol in POPULAR_STOCKS.values()],
+    run_at=os.environ.get("PRECOMPUTE_AT", "16:00"),
+    tz=os.environ.get("PRECOMPUTE_TZ", "Asia/Kolkata"),
+    max_workers=int(os.environ.get("PRECOMPUTE_WORKERS", "2")),
+    before_run=warmup.warm_up
+)
+
+# Precomputed payload for this request, if it was built from at least the price history a live
+# forecast would use. After the close the payload already includes the session's bar that the
+# store only picks up the next day, so it keeps serving until the following run replaces it.
+def lookup_precomputed(ticker, period_type, period_value, interval_mode, engine):
+    payload = PRECOMPUTE.get((ticker, period_type, period_value, interval_mode, engine))
+    if payload is None:
+        return None
+    data = PRICE_CACHE.get(ticker, start=TRAINING_START)
+    if data.empty or data.index[-1] > payload["data_date"]:
+        return None
+    return payload
+
+# Forecasts made from the form are only downloadable from the browser session that made them
+def session_id():
+    if "sid" not in session:
+        session["sid"] = uuid.uuid4().hex
+    return session["sid"]
+
 @app.route("/", methods=["GET", "POST"])
 def index():
-    global FORECAST_STORAGE
     plot_div = None
     error = None
     stock_info = None
@@ -345,6 +394,14 @@ def index():
     forecast_id = None
     image_path = None
     theme = request.form.get('theme', 'dark')
+    interval_mode = request.form.get('interval_mode', DEFAULT_INTERVAL_MODE)
+    if interval_mode not in INTERVAL_MODES:
+        interval_mode = DEFAULT_INTERVAL_MODE
+    engine = request.form.get('engine', DEFAULT_ENGINE)
+    if engine not in ENGINES:
+        engine = DEFAULT_ENGINE
+    template_args = dict(popular_stocks=POPULAR_STOCKS, interval_modes=INTERVAL_MODE_LABELS, interval_mode=interval_mode,
+                         engines=ENGINES.values(), engine=engine, theme=theme)
 
     if request.method == "POST":
         ticker = request.form.get("ticker", "").strip().upper()
@@ -354,16 +411,15 @@ def index():
                 period_value = int(request.form.get("period_days", 30))
                 if not 1 <= period_value <= 90:
                     raise ValueError("Days must be between 1 and 90.")
-                period = period_value
             elif period_type == "months":
                 period_value = int(request.form.get("period_months", 1))
-                period = period_value * 30
             else:  # years
+                period_type = "years"
                 period_value = int(request.form.get("period_years", 1))
-                period = period_value * 365
+            period = horizon_days(period_type, period_value)
         except ValueError as e:
             error = f"Invalid period value: {str(e)}"
-            return render_template_string(HTML_TEMPLATE, error=error, popular_stocks=POPULAR_STOCKS, theme=theme)
+            return render_template(PAGE_TEMPLATE, error=error, **template_args)
 
         if '.' not in ticker:
             ticker = f"{ticker}.NS"
@@ -371,141 +427,269 @@ def index():
         stock_info = {'ticker': ticker}
 
         try:
-            end_date = date.today().strftime("%Y-%m-%d")
-            data = yf.download(ticker, start="2018-01-01", end=end_date, progress=False)
-            if data.empty:
-                raise ValueError(f"No data found for stock symbol {ticker}")
-            
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            stock_info = {
-                "ticker": ticker,
-                "name": info.get("longName", ticker),
-                "price": f"{info.get('regularMarketPrice', 'N/A')} {info.get('currency', '')}",
-                "market_cap": f"{info.get('marketCap', 'N/A') / 1e9:.2f}B {info.get('currency', '')}" if isinstance(info.get('marketCap'), (int, float)) else "N/A",
-                "sector": info.get("sector", "N/A")
-            }
+            precomputed = lookup_precomputed(ticker, period_type, period_value, interval_mode, engine)
+        except Exception as e:
+            logger.warning(f"Error checking precomputed forecast: {str(e)}")
+            precomputed = None
+        if precomputed is not None:
+            forecast_id = FORECAST_STORE.put(CompactForecast.from_frame(precomputed["forecast_data"]), session_id())
+            plot_div = precomputed["plot_divs"]['dark' if theme == 'dark' else 'light']
+            return render_template(PAGE_TEMPLATE, plot_div=plot_div, error=error, stock_info=precomputed["stock_info"], suggestions=suggestions, forecast_id=forecast_id, image_path=precomputed["image_path"], **template_args)
+
+        try:
+            data, stock_info = INFLIGHT.do(("load", ticker, date.today()), load_stock_data, ticker)
         except Exception as e:
             error = f"Error loading data for symbol {ticker}: {str(e)}"
             suggestions = [symbol for name, symbol in POPULAR_STOCKS.items() if ticker.replace('.NS', '').lower() in symbol.lower() or ticker.replace('.NS', '').lower() in name.lower()]
             suggestions = [f"{s}.NS" for s in suggestions]
-            return render_template_string(HTML_TEMPLATE, error=error, suggestions=suggestions, popular_stocks=POPULAR_STOCKS, theme=theme)
+            return render_template(PAGE_TEMPLATE, error=error, suggestions=suggestions, **template_args)
 
-        df_train = data[['Close']].reset_index()
-        df_train.columns = ["ds", "y"]
-        df_train['y'] = pd.to_numeric(df_train['y'], errors='coerce')
-        df_train = df_train.dropna(subset=['y'])
+        df_train = training_frame(data)
 
         if df_train.shape[0] < 2:
             error = "Not enough data to generate a forecast."
         else:
             try:
-                m = Prophet()
-                m.fit(df_train)
-                future = m.make_future_dataframe(periods=period)
-                forecast = m.predict(future)
-
-                forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-                forecast_data.columns = ['Date', 'Forecast', 'Lower Bound', 'Upper Bound']
-
-                forecast_id = str(uuid.uuid4())
-                FORECAST_STORAGE[forecast_id] = forecast_data
-
-                fig = go.Figure()
-
-                fig.add_trace(go.Scatter(
-                    x=df_train['ds'], y=df_train['y'],
-                    mode='lines', name='Historical',
-                    line=dict(color='#3b82f6'),
-                    hovertemplate='%{y:.2f}<br>%{x|%Y-%m-%d}'
-                ))
-
-                fig.add_trace(go.Scatter(
-                    x=forecast['ds'], y=forecast['yhat'],
-                    mode='lines', name='Forecast',
-                    line=dict(color='#60a5fa'),
-                    hovertemplate='%{y:.2f}<br>%{x|%Y-%m-%d}'
-                ))
-
-                fig.add_trace(go.Scatter(
-                    x=forecast['ds'], y=forecast['yhat_upper'],
-                    mode='lines', name='Upper Bound',
-                    line=dict(width=0),
-                    showlegend=False,
-                    hoverinfo='skip'
-                ))
-
-                fig.add_trace(go.Scatter(
-                    x=forecast['ds'], y=forecast['yhat_lower'],
-                    mode='lines', name='Lower Bound',
-                    line=dict(width=0),
-                    fill='tonexty',
-                    fillcolor='rgba(59, 130, 246, 0.2)',
-                    showlegend=True,
-                    hovertemplate='Lower: %{y:.2f}<br>%{x|%Y-%m-%d}'
-                ))
-
-                fig.update_layout(
-                    title=f"{stock_info['name']} Forecast for {period_value} {period_type.capitalize()}",
-                    xaxis_title='Date',
-                    yaxis_title='Stock Price',
-                    template='plotly_dark' if theme == 'dark' else 'plotly_white',
-                    hovermode='x unified',
-                    hoverlabel=dict(
-                        bgcolor='rgba(0, 0, 0, 0.9)',
-                        font=dict(color='white', family='Poppins, sans-serif'),
-                        bordercolor='#3b82f6'
-                    ),
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                    margin=dict(l=20, r=20, t=60, b=20),
-                    font=dict(family="Poppins, sans-serif", color="#ffffff"),
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)",
-                    xaxis=dict(gridcolor='rgba(255, 255, 255, 0.1)'),
-                    yaxis=dict(gridcolor='rgba(255, 255, 255, 0.1)')
-                )
-
-                plot_div = fig.to_html(full_html=False, include_plotlyjs='cdn')
-
-                # Save plot as image
-                try:
-                    folder = "pridiction of the stock"
-                    os.makedirs(folder, exist_ok=True)
-                    image_name = f"{date.today().strftime('%Y-%m-%d')}_{ticker.replace('.NS', '')}.png"
-                    image_path = os.path.join(folder, image_name)
-                    pio.write_image(fig, file=image_path, format='png', width=1200, height=600)
-                    image_path = image_name
-                except Exception as e:
-                    print(f"Error saving image: {str(e)}")
-                    image_path = "Failed to save image"
+                ensure_model(ticker, df_train, engine)
+                forecast = engine_predict(engine, ticker, df_train, [period], interval_mode)[period]
+                forecast_data = to_forecast_data(forecast)
+
+                forecast_id = FORECAST_STORE.put(CompactForecast.from_frame(forecast_data), session_id())
+
+                title = f"{stock_info['name']} Forecast for {period_value} {period_type.capitalize()}"
+                fig = build_figure(df_train, forecast, title, theme)
+                plot_div = figure_html(fig)
+                image_path = save_image(fig, ticker)
 
             except Exception as e:
                 error = f"Error generating forecast: {str(e)}"
 
-    return render_template_string(HTML_TEMPLATE, plot_div=plot_div, error=error, stock_info=stock_info, popular_stocks=POPULAR_STOCKS, suggestions=suggestions, forecast_id=forecast_id, image_path=image_path, theme=theme)
-
+    return render_template(PAGE_TEMPLATE, plot_div=plot_div, error=error, stock_info=stock_info, suggestions=suggestions, forecast_id=forecast_id, image_path=image_path, **template_args)
+
+# Validate an API horizon request, returning its length in days
+def parse_period(period_type, period_value):
+    limits = {"days": 90, "months": 12, "years": 4}
+    if period_type not in limits:
+        raise ValueError(f"Unknown period type {period_type}")
+    period_value = int(period_value)
+    if not 1 <= period_value <= limits[period_type]:
+        raise ValueError(f"{period_type.capitalize()} must be between 1 and {limits[period_type]}.")
+    return period_value, horizon_days(period_type, period_value)
+
+# Runs on a job thread outside any request, so API results are stored without a session and the
+# unguessable download_url is the only key to them
+def forecast_payload(ticker, stock_info, forecast_data, plot_div, image_path):
+    forecast_id = FORECAST_STORE.put(CompactForecast.from_frame(forecast_data))
+    return {
+        "stock_info": stock_info,
+        "forecast_id": forecast_id,
+        "download_url": f"/download?ticker={ticker}&forecast_id={forecast_id}",
+        "forecast": {
+            "dates": forecast_data['Date'].dt.strftime('%Y-%m-%d').tolist(),
+            "forecast": forecast_data['Forecast'].round(4).tolist(),
+            "lower": forecast_data['Lower Bound'].round(4).tolist(),
+            "upper": forecast_data['Upper Bound'].round(4).tolist(),
+        },
+        "plot_div": plot_div,
+        "image_path": image_path,
+        "image_url": f"/images/{image_path}",
+    }
+
+# Background forecast reporting fetching, fitting, predicting and rendering stages
+def run_forecast_job(job, ticker, period_type, period_value, period, theme, interval_mode, engine):
+    precomputed = lookup_precomputed(ticker, period_type, period_value, interval_mode, engine)
+    if precomputed is not None:
+        plot_div = precomputed["plot_divs"]['dark' if theme == 'dark' else 'light']
+        return forecast_payload(ticker, precomputed["stock_info"], precomputed["forecast_data"], plot_div, precomputed["image_path"])
+
+    job.advance("fetching")
+    data, stock_info = INFLIGHT.do(("load", ticker, date.today()), load_stock_data, ticker)
+    df_train = training_frame(data)
+    if df_train.shape[0] < 2:
+        raise ValueError("Not enough data to generate a forecast.")
+
+    job.advance("fitting")
+    ensure_model(ticker, df_train, engine)
+
+    job.advance("predicting")
+    forecast = engine_predict(engine, ticker, df_train, [period], interval_mode)[period]
+    forecast_data = to_forecast_data(forecast)
+
+    job.advance("rendering")
+    title = f"{stock_info['name']} Forecast for {period_value} {period_type.capitalize()}"
+    fig = build_figure(df_train, forecast, title, theme)
+    plot_div = figure_html(fig)
+    image_path = save_image(fig, ticker)
+    return forecast_payload(ticker, stock_info, forecast_data, plot_div, image_path)
+
+# Everything a forecast depends on: the last bar (date and close, which moves intraday) and the model
+# settings. Hashing it gives an ETag that can be checked before anything is fitted.
+def forecast_etag(ticker, df_train, horizon, engine, interval_mode):
+    last = df_train.iloc[-1]
+    engine_params = sorted(vars(get_engine(engine)).items())
+    key = (API_VERSION, ticker, str(last['ds']), float(last['y']), len(df_train), TRAINING_START,
+           horizon, engine, engine_params, INTERVAL_WIDTH, interval_mode)
+    return hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+
+# Columnar forecast: dates as day offsets from a base date, values as parallel arrays. The first
+# history_rows rows are in-sample fits, the rest the forecast itself.
+def columnar_forecast(ticker, df_train, horizon, engine, interval_mode):
+    ensure_model(ticker, df_train, engine)
+    forecast = engine_predict(engine, ticker, df_train, [horizon], interval_mode)[horizon]
+    stored = CompactForecast.from_frame(to_forecast_data(forecast))
+    return {
+        "ticker": ticker,
+        "engine": engine,
+        "interval_mode": interval_mode,
+        "interval_width": INTERVAL_WIDTH,
+        "horizon": horizon,
+        "data_date": pd.Timestamp(df_train['ds'].iloc[-1]).strftime('%Y-%m-%d'),
+        "history_rows": len(stored) - horizon,
+        "dates": {"base": str(stored.base), "unit": "day", "offsets": stored.offsets.tolist()},
+        "forecast": np.round(stored.forecast.astype(float), 4).tolist(),
+        "lower": np.round(stored.lower.astype(float), 4).tolist(),
+        "upper": np.round(stored.upper.astype(float), 4).tolist(),
+    }
+
+# Polling endpoint for dashboards. Only the (cached) price history is read before the ETag check, so
+# a client sending If-None-Match gets a 304 without a fit or predict until new market data arrives.
+@app.route("/api/forecast", methods=["GET"])
+def get_forecast():
+    ticker = request.args.get("ticker", "").strip().upper()
+    interval_mode = request.args.get("interval_mode", DEFAULT_INTERVAL_MODE)
+    engine = request.args.get("engine", DEFAULT_ENGINE)
+    if not ticker:
+        return jsonify({"error": "ticker is required"}), 400
+    try:
+        horizon = int(request.args.get("horizon", 30))
+        if not 1 <= horizon <= API_MAX_HORIZON:
+            raise ValueError(f"horizon must be between 1 and {API_MAX_HORIZON} days.")
+        validate_mode(interval_mode)
+        get_engine(engine)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if '.' not in ticker:
+        ticker = f"{ticker}.NS"
+
+    # 502 when the market data provider fails, 404 when it has nothing for the ticker
+    try:
+        df_train = training_frame(PRICE_CACHE.get(ticker, start=TRAINING_START))
+    except Exception as e:
+        return jsonify({"error": f"Error loading data for symbol {ticker}: {str(e)}"}), 502
+    if df_train.shape[0] < 2:
+        return jsonify({"error": f"No data found for stock symbol {ticker}"}), 404
+
+    etag = forecast_etag(ticker, df_train, horizon, engine, interval_mode)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if request.if_none_match.contains_weak(etag):
+        return "", 304, headers
+    try:
+        payload = INFLIGHT.do(("api", etag), columnar_forecast, ticker, df_train, horizon, engine, interval_mode)
+    except Exception as e:
+        return jsonify({"error": f"Error generating forecast: {str(e)}"}), 500
+    return jsonify(payload), 200, headers
+
+@app.route("/api/forecast", methods=["POST"])
+def submit_forecast_job():
+    params = request.get_json(silent=True) or request.form
+    ticker = str(params.get("ticker", "")).strip().upper()
+    period_type = params.get("period_type", "days")
+    theme = params.get("theme", "dark")
+    interval_mode = params.get("interval_mode", DEFAULT_INTERVAL_MODE)
+    engine = params.get("engine", DEFAULT_ENGINE)
+    if not ticker:
+        return jsonify({"error": "ticker is required"}), 400
+    try:
+        period_value, period = parse_period(period_type, params.get("period_value", 30))
+        validate_mode(interval_mode)
+        get_engine(engine)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if '.' not in ticker:
+        ticker = f"{ticker}.NS"
+
+    job = JOBS.submit(run_forecast_job, ticker, period_type, period_value, period, theme, interval_mode, engine)
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/forecast/{job.id}",
+        "events_url": f"/api/forecast/{job.id}/events",
+    }), 202
+
+@app.route("/api/forecast/<job_id>")
+def forecast_job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/api/forecast/<job_id>/events")
+def forecast_job_events(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return Response(sse_stream(job), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.route("/precompute/status")
+def precompute_status():
+    return jsonify(PRECOMPUTE.status())
+
+# Saved chart images; 202 while the renderer is still working on one
+@app.route("/images/<name>")
+def forecast_image(name):
+    status = IMAGE_RENDERER.status(name)
+    if status == READY:
+        return send_from_directory(IMAGE_RENDERER.folder, name, mimetype="image/png", max_age=86400)
+    if status == FAILED:
+        return jsonify({"status": status, "error": IMAGE_RENDERER.error(name)}), 500
+    if status is None:
+        return jsonify({"error": "Unknown image"}), 404
+    return jsonify({"status": status}), 202, {"Retry-After": "1"}
+
+# Stylesheet and scripts under content-hashed names, cached by browsers for a year
+@app.route("/assets/<name>")
+def static_asset(name):
+    return STATIC_ASSETS.response(name)
+
+@app.route("/images/status")
+def image_renderer_status():
+    return jsonify(IMAGE_RENDERER.stats())
+
+@app.route("/forecast-store/status")
+def forecast_store_status():
+    return jsonify(FORECAST_STORE.stats())
+
+# Streams the stored forecast in chunks, so the first bytes go out before the rest is serialized
 @app.route("/download")
 def download_forecast():
-    global FORECAST_STORAGE
     ticker = request.args.get('ticker', 'STOCK')
     forecast_id = request.args.get('forecast_id', '')
-    
-    forecast_data = FORECAST_STORAGE.get(forecast_id)
-    if forecast_data is None or forecast_data.empty:
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return f"Unknown format {fmt}; expected one of {', '.join(EXPORT_FORMATS)}", 400
+
+    # Read without removing: the page links every format to the same id, and the store's LRU and TTL
+    # retire it
+    stored = FORECAST_STORE.get(forecast_id, session.get("sid"))
+    if stored is None or stored.empty:
         return "No forecast data available", 400
 
-    del FORECAST_STORAGE[forecast_id]
-
-    buffer = io.StringIO()
-    forecast_data.to_csv(buffer, index=False)
-    buffer.seek(0)
-
-    return send_file(
-        io.BytesIO(buffer.getvalue().encode()),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f"{ticker}_forecast.csv"
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    file_name = secure_filename(f"{ticker}_forecast.{extension}")
+    return Response(
+        iter_export(stored, fmt),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={file_name}"}
     )
 
+# Development server. server.py is the entry point: spawned forecast workers re-import the main
+# module, and with app.py as __main__ each of them would load the whole web stack.
+def main():
+    # Only warm up in the reloader child so prices aren't fetched twice in debug mode
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warmup.start_schedule(POPULAR_STOCKS)
+        PRECOMPUTE.start()
+    app.run(host="127.0.0.1", port=5000, debug=True)
+
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=5000, debug=True)
\ No newline at end of file
+    main()
@@ -0,0 +1,173 @@
+"""Rolling-origin backtest of forecast engines over stored price history (no network access).
+
+Usage: python backtest.py --popular --engines prophet numpy --origins 6 --step 60 --workers 8
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import intervals
+import price_store
+from batch_forecast import resolve_tickers
+from engines import ENGINES, HORIZON_DAYS, get_engine, horizon_days, training_frame
+
+BACKTEST_DIR = os.environ.get("BACKTEST_DIR", "backtests")
+
+DEFAULT_HORIZONS = ["days:30", "months:3", "months:6", "years:1"]
+
+
+def parse_horizon(spec):
+    period_type, _, value = spec.partition(":")
+    if period_type not in HORIZON_DAYS or not value.isdigit():
+        raise argparse.ArgumentTypeError(f"Horizon must look like days:30, months:6 or years:1, got {spec}")
+    return spec, horizon_days(period_type, value)
+
+
+# Forecast origins spaced step days apart, latest first, leaving room for the longest horizon
+def origins_for(df, n_origins, step, max_horizon, min_train):
+    last = df['ds'].iloc[-1]
+    origins = []
+    origin = last - pd.Timedelta(days=max_horizon)
+    while len(origins) < n_origins:
+        if (df['ds'] <= origin).sum() < min_train:
+            break
+        origins.append(origin)
+        origin -= pd.Timedelta(days=step)
+    return origins
+
+
+def score(forecast, actuals):
+    joined = actuals.merge(forecast, on='ds', how='inner')
+    if joined.empty:
+        return None
+    error = joined['yhat'] - joined['y']
+    return {
+        "n": len(joined),
+        "mape": float(np.mean(np.abs(error) / np.abs(joined['y']))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "coverage": float(np.mean((joined['y'] >= joined['yhat_lower']) & (joined['y'] <= joined['yhat_upper']))),
+    }
+
+
+# Runs in a worker process: every origin and horizon of one ticker for one engine
+def backtest_ticker(ticker, engine_name, horizons, n_origins, step, start, interval_width, interval_mode, min_train):
+    df = training_frame(price_store.read_history(ticker, start))
+    if df.empty:
+        raise ValueError(f"No stored history for {ticker}; run the app, warm-up or batch_forecast first")
+    max_horizon = max(days for _, days in horizons)
+    engine = get_engine(engine_name)
+    rows = []
+    for origin in origins_for(df, n_origins, step, max_horizon, min_train):
+        train = df[df['ds'] <= origin]
+
+        started = time.perf_counter()
+        model = engine.fit(train, interval_width)
+        fit_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        forecast, history_rows = engine.predict(model, max_horizon, interval_mode, "none")
+        predict_seconds = time.perf_counter() - started
+
+        for label, days in horizons:
+            actuals = df[(df['ds'] > origin) & (df['ds'] <= origin + pd.Timedelta(days=days))]
+            metrics = score(forecast.iloc[history_rows:], actuals)
+            if metrics is None:
+                continue
+            rows.append({
+                "ticker": ticker,
+                "engine": engine_name,
+                "origin": origin,
+                "horizon": label,
+                "horizon_days": days,
+                "train_rows": len(train),
+                "fit_seconds": fit_seconds,
+                "predict_seconds": predict_seconds,
+                **metrics,
+            })
+    return rows
+
+
+def summarize(results):
+    summary = results.groupby(["engine", "horizon_days", "horizon"]).agg(
+        tickers=("ticker", "nunique"),
+        windows=("origin", "count"),
+        mape=("mape", "mean"),
+        rmse=("rmse", "mean"),
+        coverage=("coverage", "mean"),
+        fit_seconds=("fit_seconds", "mean"),
+        predict_seconds=("predict_seconds", "mean"),
+    )
+    return summary.reset_index(level="horizon_days", drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="*", help="symbols to backtest (.NS added when no suffix)")
+    parser.add_argument("--universe", help="file with one symbol per line")
+    parser.add_argument("--popular", action="store_true", help="include POPULAR_STOCKS")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--horizons", nargs="+", type=parse_horizon, default=[parse_horizon(h) for h in DEFAULT_HORIZONS])
+    parser.add_argument("--origins", type=int, default=4, help="rolling origins per ticker")
+    parser.add_argument("--step", type=int, default=90, help="days between origins")
+    parser.add_argument("--min-train", type=int, default=500, help="minimum training rows at an origin")
+    parser.add_argument("--start", default=price_store.DEFAULT_START)
+    parser.add_argument("--interval-width", type=float, default=0.8)
+    parser.add_argument("--interval-mode", choices=intervals.INTERVAL_MODES, default=intervals.DEFAULT_INTERVAL_MODE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--output-dir", default=BACKTEST_DIR)
+    args = parser.parse_args()
+
+    symbols = resolve_tickers(args)
+    if not symbols:
+        parser.error("no tickers given; pass symbols, --popular or --universe")
+
+    started = time.perf_counter()
+    rows, failures = [], {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(backtest_ticker, ticker, engine, args.horizons, args.origins, args.step, args.start,
+                        args.interval_width, args.interval_mode, args.min_train): (ticker, engine)
+            for ticker in symbols
+            for engine in args.engines
+        }
+        for future in as_completed(futures):
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                failures["/".join(futures[future])] = str(e)
+    wall_seconds = time.perf_counter() - started
+
+    for key, error in failures.items():
+        print(f"{key} failed: {error}")
+    if not rows:
+        print("No backtest windows were scored.")
+        return
+
+    results = pd.DataFrame(rows)
+    summary = summarize(results)
+    with pd.option_context("display.width", 160, "display.max_columns", None, "display.float_format", "{:.4f}".format):
+        print(summary)
+    print(f"\n{len(results)} windows over {results['ticker'].nunique()} tickers in {wall_seconds:.1f}s")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    results.to_parquet(os.path.join(args.output_dir, f"{run_id}_windows.parquet"), index=False)
+    with open(os.path.join(args.output_dir, f"{run_id}_summary.json"), "w") as f:
+        json.dump({
+            "run_id": run_id,
+            "args": {k: v for k, v in vars(args).items()},
+            "wall_seconds": wall_seconds,
+            "failures": failures,
+            "summary": summary.reset_index().to_dict(orient="records"),
+        }, f, indent=2, default=str)
+    print(f"Saved results as {run_id} in {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Forecast a whole ticker universe without a browser or web server.
+
+Usage: python batch_forecast.py --popular --universe nse.txt --horizon 365 --workers 8 --output forecasts.parquet
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import intervals
+import price_store
+import warmup
+from engines import DEFAULT_ENGINE, ENGINES, get_engine, training_frame
+from stocks import POPULAR_STOCKS
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "fit", "predict", "write")
+
+
+def part_path(parts_dir, ticker):
+    return os.path.join(parts_dir, f"{ticker.replace(os.sep, '_')}.parquet")
+
+
+# Runs in a worker process: fetch, fit, predict and write one ticker's forecast as a part file
+def forecast_ticker(ticker, engine, horizon, start, interval_width, interval_mode, insample, parts_dir):
+    timings = {}
+    started = time.perf_counter()
+    data = price_store.get_history(ticker, start=start)
+    df_train = training_frame(data)
+    if df_train.shape[0] < 2:
+        raise ValueError(f"No or insufficient data found for stock symbol {ticker}")
+    timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model = get_engine(engine).fit_cached(ticker, df_train, interval_width)
+    timings["fit"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    forecast, history_rows = get_engine(engine).predict(model, horizon, interval_mode, insample)
+    timings["predict"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    forecast.insert(0, "ticker", ticker)
+    forecast["in_sample"] = np.arange(len(forecast)) < history_rows
+    path = part_path(parts_dir, ticker)
+    forecast.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    timings["write"] = time.perf_counter() - started
+    return ticker, timings
+
+
+def resolve_tickers(args):
+    symbols = [warmup.to_symbol(t) for t in args.tickers]
+    if args.popular:
+        symbols += [warmup.to_symbol(s) for s in POPULAR_STOCKS.values()]
+    if args.universe:
+        symbols += warmup.read_universe_file(args.universe)
+    return list(dict.fromkeys(symbols))
+
+
+def print_summary(timings, failures, wall_seconds, total):
+    print(f"\nForecast {len(timings)}/{total} tickers in {wall_seconds:.1f}s wall time")
+    print(f"{'stage':<10}{'total s':>10}{'mean s':>10}{'p95 s':>10}")
+    for stage in STAGES:
+        values = np.array([t[stage] for t in timings.values() if stage in t])
+        if len(values):
+            print(f"{stage:<10}{values.sum():>10.2f}{values.mean():>10.3f}{np.percentile(values, 95):>10.3f}")
+    if failures:
+        print(f"\n{len(failures)} failed:")
+        for ticker, error in failures.items():
+            print(f"  {ticker}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="*", help="symbols to forecast (.NS added when no suffix)")
+    parser.add_argument("--universe", help="file with one symbol per line")
+    parser.add_argument("--popular", action="store_true", help="include POPULAR_STOCKS")
+    parser.add_argument("--engine", choices=list(ENGINES), default=DEFAULT_ENGINE)
+    parser.add_argument("--horizon", type=int, default=30, help="forecast horizon in days")
+    parser.add_argument("--start", default=price_store.DEFAULT_START, help="training start date")
+    parser.add_argument("--interval-width", type=float, default=0.8)
+    parser.add_argument("--interval-mode", choices=intervals.INTERVAL_MODES, default=intervals.DEFAULT_INTERVAL_MODE)
+    parser.add_argument("--insample", choices=intervals.INSAMPLE_MODES, default="none",
+                        help="also write in-sample fitted values")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--output", default="forecasts.parquet")
+    parser.add_argument("--resume", action="store_true", help="skip tickers already written by an interrupted run")
+    parser.add_argument("--no-prefetch", action="store_true", help="skip the batched price download")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    symbols = resolve_tickers(args)
+    if not symbols:
+        parser.error("no tickers given; pass symbols, --popular or --universe")
+
+    parts_dir = args.output + ".parts"
+    if os.path.isdir(parts_dir) and not args.resume:
+        for name in os.listdir(parts_dir):
+            os.remove(os.path.join(parts_dir, name))
+    os.makedirs(parts_dir, exist_ok=True)
+    pending = [s for s in symbols if not os.path.exists(part_path(parts_dir, s))]
+    if len(pending) < len(symbols):
+        print(f"Resuming: {len(symbols) - len(pending)} tickers already done")
+
+    wall_started = time.perf_counter()
+    if pending and not args.no_prefetch:
+        started = time.perf_counter()
+        warmup.warm_up(pending, start=args.start)
+        print(f"Prefetched prices in {time.perf_counter() - started:.1f}s")
+
+    timings, failures = {}, {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(forecast_ticker, ticker, args.engine, args.horizon, args.start, args.interval_width,
+                        args.interval_mode, args.insample, parts_dir): ticker
+            for ticker in pending
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            ticker = futures[future]
+            try:
+                _, timings[ticker] = future.result()
+            except Exception as e:
+                failures[ticker] = str(e)
+            print(f"[{i}/{len(pending)}] {ticker} {'failed' if ticker in failures else 'done'}", flush=True)
+
+    parts = [part_path(parts_dir, s) for s in symbols if os.path.exists(part_path(parts_dir, s))]
+    if parts:
+        pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True).to_parquet(args.output, index=False)
+        print(f"Wrote {len(parts)} forecasts to {args.output}")
+    if not failures:
+        for p in parts:
+            os.remove(p)
+        os.rmdir(parts_dir)
+
+    print_summary(timings, failures, time.perf_counter() - wall_started, len(pending))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure predict latency and interval drift of each interval mode against full sampling.
+
+Usage: python benchmarks/interval_modes.py RELIANCE.NS --horizons 30 365 1460 --repeats 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intervals  # noqa: E402
+import price_store  # noqa: E402
+from engines import training_frame  # noqa: E402
+from model_cache import fit_prophet  # noqa: E402
+
+
+def timed_predict(m, future, mode, repeats):
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        forecast = intervals.predict(m, future, mode)
+        seconds.append(time.perf_counter() - started)
+    return forecast, float(np.median(seconds))
+
+
+def bench_ticker(ticker, horizons, repeats, interval_width, start):
+    df_train = training_frame(price_store.get_history(ticker, start=start))
+    m = fit_prophet(df_train, interval_width)
+    rows = []
+    for horizon in horizons:
+        future = m.make_future_dataframe(periods=horizon)
+        reference, reference_seconds = timed_predict(m, future, "sampled", repeats)
+        reference_width = (reference['yhat_upper'] - reference['yhat_lower']).values
+        future_rows = slice(len(df_train), None)
+        for mode in intervals.INTERVAL_MODES:
+            if mode == "sampled":
+                forecast, seconds = reference, reference_seconds
+            else:
+                forecast, seconds = timed_predict(m, future, mode, repeats)
+            width = (forecast['yhat_upper'] - forecast['yhat_lower']).values
+            bound_error = (
+                np.abs(forecast['yhat_lower'].values - reference['yhat_lower'].values)
+                + np.abs(forecast['yhat_upper'].values - reference['yhat_upper'].values)
+            ) / 2 / reference_width
+            rows.append({
+                "ticker": ticker,
+                "horizon": horizon,
+                "mode": mode,
+                "predict_seconds": round(seconds, 4),
+                "speedup_vs_sampled": round(reference_seconds / seconds, 2),
+                "width_ratio_vs_sampled": round(float(np.mean(width[future_rows] / reference_width[future_rows])), 4),
+                "bound_error_vs_sampled": round(float(np.mean(bound_error[future_rows])), 4),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[30, 365, 1460])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--interval-width", type=float, default=0.8)
+    parser.add_argument("--start", default=price_store.DEFAULT_START)
+    args = parser.parse_args()
+
+    for ticker in args.tickers:
+        for row in bench_ticker(ticker, args.horizons, args.repeats, args.interval_width, args.start):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Drive a realistic request mix against the Flask app and report latency, throughput, errors and RSS.
+
+By default it starts app.py in a subprocess on the synthetic market data provider with scratch
+price and model stores, so no network is needed; pass --url to target a server that is already
+running (and --server-pid to sample its memory). Each virtual user loops: POST / for a popular or
+random ticker at a random horizon, then sometimes GET /download for the forecast it just got.
+RSS covers the server and its child processes (the forecast pool) and is read from /proc.
+
+Usage: python benchmarks/load_test.py --concurrency 16 --duration 120 --engine numpy --output load.json
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from stocks import POPULAR_STOCKS  # noqa: E402
+
+# Horizons offered by the form, as (period_type, form field, value)
+HORIZONS = [
+    ("days", "period_days", 7), ("days", "period_days", 30), ("days", "period_days", 90),
+    ("months", "period_months", 3), ("months", "period_months", 6),
+    ("years", "period_years", 1), ("years", "period_years", 2), ("years", "period_years", 4),
+]
+
+FORECAST_ID = re.compile(r"forecast_id=([0-9a-f-]{36})")
+# The template renders every user-facing failure in this block
+ERROR_MARKER = 'class="text-red-400"'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, scratch, provider):
+    env = dict(os.environ,
+               MARKET_DATA_PROVIDER=provider,
+               PRICE_STORE_DIR=os.path.join(scratch, "prices"),
+               MODEL_CACHE_DIR=os.path.join(scratch, "models"))
+    code = (f"import sys; sys.path.insert(0, {REPO_DIR!r}); import app; "
+            f"app.app.run(host='127.0.0.1', port={port}, threaded=True)")
+    # Run from the scratch directory so saved forecast images don't land in the repo
+    server = subprocess.Popen([sys.executable, "-c", code], cwd=scratch, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/precompute/status", timeout=1)
+            return server
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.25)
+    server.kill()
+    raise RuntimeError("Server did not start within 60s")
+
+
+def _children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children += [int(c) for c in f.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+# RSS of pid plus all of its descendants
+def tree_rss(pid):
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _rss_bytes(current)
+        pending += _children(current)
+    return total
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def add(self, kind, started, seconds, ok, detail=""):
+        with self.lock:
+            self.samples.append({"kind": kind, "t": started, "seconds": seconds, "ok": ok, "detail": detail})
+
+
+def request(opener, recorder, kind, started_at, url, data=None, timeout=300):
+    started = time.perf_counter()
+    try:
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        with opener.open(url, data=body, timeout=timeout) as response:
+            payload = response.read()
+        ok, detail = True, ""
+        if kind == "forecast" and ERROR_MARKER.encode() in payload:
+            ok, detail = False, "app_error"
+    except urllib.error.HTTPError as e:
+        payload, ok, detail = b"", False, f"http_{e.code}"
+    except Exception as e:
+        payload, ok, detail = b"", False, type(e).__name__
+    recorder.add(kind, started - started_at, time.perf_counter() - started, ok, detail)
+    return payload if ok else None
+
+
+def virtual_user(base_url, args, recorder, started_at, stop, seed):
+    rng = random.Random(seed)
+    # Each virtual user keeps its own cookies, like a browser, so downloads see their session's forecasts
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    popular = list(POPULAR_STOCKS.values())
+    while not stop.is_set():
+        if rng.random() < args.popular_share:
+            ticker = rng.choice(popular)
+        else:
+            ticker = f"SYN{rng.randrange(args.random_universe):05d}"
+        period_type, field, value = rng.choice(HORIZONS)
+        form = {"ticker": ticker, "period_type": period_type, field: value,
+                "theme": rng.choice(["dark", "light"]), "engine": args.engine}
+        page = request(opener, recorder, "forecast", started_at, base_url + "/", form)
+        if page is None or rng.random() >= args.download_share:
+            continue
+        match = FORECAST_ID.search(page.decode(errors="ignore"))
+        if match:
+            query = urllib.parse.urlencode({"ticker": f"{ticker}.NS", "forecast_id": match.group(1)})
+            request(opener, recorder, "download", started_at, f"{base_url}/download?{query}")
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 4) if len(values) else None
+
+
+def summarize(samples, wall_seconds):
+    report = {}
+    for kind in sorted({s["kind"] for s in samples}):
+        rows = [s for s in samples if s["kind"] == kind]
+        latencies = [s["seconds"] for s in rows if s["ok"]]
+        errors = {}
+        for s in rows:
+            if not s["ok"]:
+                errors[s["detail"]] = errors.get(s["detail"], 0) + 1
+        report[kind] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / wall_seconds, 3),
+            "error_rate": round(sum(errors.values()) / len(rows), 4),
+            "errors": errors,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(max(latencies), 4) if latencies else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="pid to sample RSS from when using --url")
+    parser.add_argument("--provider", default="synthetic", help="market data provider for the started server")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds to generate load")
+    parser.add_argument("--engine", default="prophet")
+    parser.add_argument("--popular-share", type=float, default=0.8, help="share of requests for POPULAR_STOCKS")
+    parser.add_argument("--random-universe", type=int, default=5000, help="number of distinct random tickers")
+    parser.add_argument("--download-share", type=float, default=0.3, help="share of forecasts followed by a download")
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the full report as JSON")
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory()
+    server = None
+    if args.url:
+        base_url, server_pid = args.url.rstrip("/"), args.server_pid
+    else:
+        port = free_port()
+        server = start_server(port, scratch.name, args.provider)
+        base_url, server_pid = f"http://127.0.0.1:{port}", server.pid
+
+    recorder, stop, rss = Recorder(), threading.Event(), []
+    started_at = time.perf_counter()
+
+    def sample_rss():
+        while not stop.wait(args.rss_interval):
+            rss.append({"t": round(time.perf_counter() - started_at, 2), "rss_bytes": tree_rss(server_pid)})
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    if server_pid:
+        sampler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for i in range(args.concurrency):
+                pool.submit(virtual_user, base_url, args, recorder, started_at, stop, args.seed + i)
+            time.sleep(args.duration)
+            stop.set()
+    finally:
+        stop.set()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        scratch.cleanup()
+    wall_seconds = time.perf_counter() - started_at
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "wall_seconds": round(wall_seconds, 2),
+        "endpoints": summarize(recorder.samples, wall_seconds),
+        "rss": rss,
+        "peak_rss_bytes": max((r["rss_bytes"] for r in rss), default=None),
+    }
+    print(f"{'endpoint':<10}{'reqs':>7}{'rps':>8}{'err %':>8}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}")
+    for kind, stats in report["endpoints"].items():
+        print(f"{kind:<10}{stats['requests']:>7}{stats['throughput_rps']:>8.2f}{stats['error_rate'] * 100:>8.1f}"
+              f"{stats['p50'] or 0:>9.3f}{stats['p95'] or 0:>9.3f}{stats['p99'] or 0:>9.3f}")
+    if report["peak_rss_bytes"]:
+        print(f"Peak server RSS {report['peak_rss_bytes'] / 2 ** 20:.0f} MiB over {len(rss)} samples")
+    if args.output:
+        report["samples"] = recorder.samples
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
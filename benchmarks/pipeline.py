@@ -0,0 +1,184 @@
+"""Time and peak memory of each forecast pipeline stage across history lengths and horizons.
+
+Runs offline: prices come from a recorded price store directory (--fixture-dir, written by
+price_store) or from market_data's seeded synthetic provider. Emits one JSON line per (history,
+horizon, stage) so results from two releases can be diffed directly. Stages time the code the app
+ships: chart_payload.figure_html for the page div, the background image renderer, and export's
+streaming writers over a stored CompactForecast, one export row per format. Peak memory is the
+Python heap as seen by tracemalloc; Stan's sampler and kaleido run out of process and are not
+included.
+
+Usage: python benchmarks/pipeline.py --years 1 5 10 20 --horizons 30 365 1460 --repeats 3 --output bench.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import market_data  # noqa: E402
+import price_store  # noqa: E402
+from app import build_figure, to_forecast_data  # noqa: E402
+from chart_payload import figure_html  # noqa: E402
+from engines import DEFAULT_ENGINE, ENGINES, get_engine, training_frame  # noqa: E402
+from export import EXPORT_FORMATS, iter_export  # noqa: E402
+from forecast_store import CompactForecast  # noqa: E402
+from image_renderer import FAILED, PENDING, ImageRenderer  # noqa: E402
+
+STAGES = ("load", "prepare", "fit", "predict", "figure", "figure_html", "write_image", "export")
+
+SYNTHETIC_TICKER = "SYNTHETIC.NS"
+
+
+# Median wall time over repeats, then one traced run for peak memory; returns the last result
+def measure(fn, repeats):
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"seconds": round(float(np.median(seconds)), 5), "peak_bytes": int(peak)}
+
+
+# Submit to the background renderer and wait for the PNG, as a client polling /images would
+def render_image(renderer, fig, ticker):
+    name = renderer.submit(fig, ticker)
+    while renderer.status(name) == PENDING:
+        time.sleep(0.01)
+    if renderer.status(name) == FAILED:
+        raise RuntimeError(renderer.error(name))
+    path = os.path.join(renderer.folder, name)
+    size = os.path.getsize(path)
+    # Remove it so the next repeat renders again instead of hitting the renderer's dedup
+    os.remove(path)
+    return size
+
+
+# Everything /download streams for one format
+def export_body(stored, fmt):
+    return b"".join(iter_export(stored, fmt))
+
+
+def bench_history(ticker, years, horizons, engine, repeats, renderer, interval_width, interval_mode, skip):
+    start = (pd.Timestamp(price_store.read_history(ticker).index[-1]) - pd.DateOffset(years=years)).strftime("%Y-%m-%d")
+    base = {"ticker": ticker, "history_years": years, "engine": engine.name}
+    rows = []
+
+    def record(stage, horizon, fn, **extra):
+        if stage in skip:
+            return None
+        try:
+            result, stats = measure(fn, repeats)
+        except Exception as e:
+            message = str(e).strip()
+            rows.append({**base, "horizon": horizon, "stage": stage,
+                         "error": message.splitlines()[0] if message else type(e).__name__})
+            return None
+        rows.append({**base, "horizon": horizon, "stage": stage, **stats, **extra})
+        return result
+
+    data = record("load", None, lambda: price_store.read_history(ticker, start))
+    if data is None:
+        data = price_store.read_history(ticker, start)
+    df_train = record("prepare", None, lambda: training_frame(data), rows=len(data))
+    if df_train is None:
+        df_train = training_frame(data)
+    model = record("fit", None, lambda: engine.fit(df_train, interval_width), rows=len(df_train))
+    if model is None:
+        return rows
+
+    for horizon in horizons:
+        predicted = record("predict", horizon, lambda: engine.predict(model, horizon, interval_mode))
+        if predicted is None:
+            continue
+        forecast = predicted[0]
+        fig = record("figure", horizon, lambda: build_figure(df_train, forecast, f"{ticker} {horizon} days", "dark"),
+                     rows=len(forecast))
+        if fig is not None:
+            html = record("figure_html", horizon, lambda: figure_html(fig))
+            if html is not None:
+                rows[-1]["bytes"] = len(html)
+            size = record("write_image", horizon, lambda: render_image(renderer, fig, ticker))
+            if size is not None:
+                rows[-1]["bytes"] = size
+        stored = CompactForecast.from_frame(to_forecast_data(forecast))
+        for fmt in EXPORT_FORMATS:
+            body = record("export", horizon, lambda: export_body(stored, fmt), format=fmt, rows=len(stored))
+            if body is not None:
+                rows[-1]["bytes"] = len(body)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture-dir", help="recorded price store directory; synthetic prices when omitted")
+    parser.add_argument("--ticker", default=None, help="ticker to read from the fixture store")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--horizons", type=int, nargs="+", default=[30, 365, 730, 1460])
+    parser.add_argument("--engine", choices=list(ENGINES), default=DEFAULT_ENGINE)
+    parser.add_argument("--interval-width", type=float, default=0.8)
+    parser.add_argument("--interval-mode", default="analytic")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip", nargs="*", choices=STAGES, default=[], help="stages to leave out, e.g. write_image")
+    parser.add_argument("--output", help="also write the JSON lines to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.fixture_dir:
+            if not args.ticker:
+                parser.error("--ticker is required with --fixture-dir")
+            price_store.STORE_DIR = args.fixture_dir
+            ticker = args.ticker
+        else:
+            price_store.STORE_DIR = os.path.join(scratch, "prices")
+            ticker = SYNTHETIC_TICKER
+            provider = market_data.SyntheticProvider(seed=args.seed)
+            today = pd.Timestamp.today().normalize()
+            start = today - pd.DateOffset(years=max(args.years))
+            price_store.put_history(ticker, provider.history([ticker], start, today)[ticker])
+
+        header = {
+            "benchmark": "pipeline",
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "source": args.fixture_dir or f"synthetic(seed={args.seed})",
+            "repeats": args.repeats,
+            "interval_mode": args.interval_mode,
+        }
+        lines = [header]
+        engine = get_engine(args.engine)
+        renderer = ImageRenderer(os.path.join(scratch, "images"), 1)
+        for years in args.years:
+            lines += bench_history(ticker, years, args.horizons, engine, args.repeats, renderer,
+                                   args.interval_width, args.interval_mode, set(args.skip))
+
+    out = open(args.output, "w") if args.output else None
+    try:
+        for line in lines:
+            text = json.dumps(line)
+            print(text)
+            if out:
+                out.write(text + "\n")
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare cold and warm-started Prophet refits over a simulated run of daily refreshes.
+
+Usage: python benchmarks/warm_start.py RELIANCE.NS TCS.NS --days 10 --horizon 365
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import price_store  # noqa: E402
+from engines import training_frame  # noqa: E402
+from model_cache import fit_prophet, warm_start_params  # noqa: E402
+
+
+def forecast_values(m, horizon):
+    future = m.make_future_dataframe(periods=horizon)
+    return m.predict(future)['yhat'].values[-horizon:]
+
+
+def bench_ticker(ticker, days, horizon, interval_width, start):
+    df_train = training_frame(price_store.get_history(ticker, start=start))
+    if len(df_train) <= days + 2:
+        raise ValueError(f"Not enough history for {ticker}")
+
+    previous = fit_prophet(df_train.iloc[:len(df_train) - days], interval_width)
+    cold_seconds, warm_seconds, differences = [], [], []
+    for i in range(days - 1, -1, -1):
+        window = df_train.iloc[:len(df_train) - i]
+
+        started = time.perf_counter()
+        cold = fit_prophet(window, interval_width)
+        cold_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        warm = fit_prophet(window, interval_width, init=warm_start_params(previous))
+        warm_seconds.append(time.perf_counter() - started)
+
+        cold_yhat = forecast_values(cold, horizon)
+        warm_yhat = forecast_values(warm, horizon)
+        differences.append(float(np.mean(np.abs(warm_yhat - cold_yhat) / np.abs(cold_yhat))))
+        previous = warm
+
+    return {
+        "ticker": ticker,
+        "rows": len(df_train),
+        "refits": days,
+        "cold_fit_seconds_mean": round(float(np.mean(cold_seconds)), 4),
+        "warm_fit_seconds_mean": round(float(np.mean(warm_seconds)), 4),
+        "speedup": round(float(np.mean(cold_seconds) / np.mean(warm_seconds)), 2),
+        "forecast_mape_vs_cold": round(float(np.mean(differences)), 6),
+        "forecast_mape_vs_cold_max": round(float(np.max(differences)), 6),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--days", type=int, default=10, help="number of simulated daily refits")
+    parser.add_argument("--horizon", type=int, default=365, help="forecast horizon in days to compare")
+    parser.add_argument("--interval-width", type=float, default=0.8)
+    parser.add_argument("--start", default=price_store.DEFAULT_START)
+    args = parser.parse_args()
+
+    for ticker in args.tickers:
+        result = bench_ticker(ticker, args.days, args.horizon, args.interval_width, args.start)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+# Plot width the payload is sized for; no trace carries more than CHART_POINTS_PER_PIXEL points
+# per horizontal pixel, so a chart costs the same whether it spans one year or twenty-five
+CHART_WIDTH_PX = int(os.environ.get("CHART_WIDTH_PX", "1200"))
+CHART_POINTS_PER_PIXEL = float(os.environ.get("CHART_POINTS_PER_PIXEL", "1"))
+
+
+def max_points(width_px=CHART_WIDTH_PX):
+    return max(int(width_px * CHART_POINTS_PER_PIXEL), 3)
+
+
+# Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the visual shape of the
+# series (peaks, troughs and trend changes), always including the first and last point
+def lttb(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # Bucket i covers rows edges[i]:edges[i + 1]; the first and last rows are buckets of their own
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Mean of each bucket, the third corner of the triangle for the bucket before it
+    means_x = (np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)).tolist()
+    means_y = (np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)).tolist()
+    # The choice in each bucket depends on the one before it, so the walk runs over plain floats
+    xs, ys, edges = x.tolist(), y.tolist(), edges.tolist()
+    selected = [0]
+    ax, ay = xs[0], ys[0]
+    for i in range(threshold - 2):
+        if i + 1 < threshold - 2:
+            cx, cy = means_x[i + 1], means_y[i + 1]
+        else:
+            cx, cy = xs[-1], ys[-1]
+        best, best_area = edges[i], -1.0
+        for j in range(edges[i], edges[i + 1]):
+            area = abs((ax - cx) * (ys[j] - ay) - (ax - xs[j]) * (cy - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        ax, ay = xs[best], ys[best]
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+# Rows of a time series worth plotting: LTTB over the non-NaN values, or all of them when few enough
+def downsample_index(ds, values, width_px=CHART_WIDTH_PX):
+    values = np.asarray(values, dtype=float)
+    keep = np.flatnonzero(~np.isnan(values))
+    limit = max_points(width_px)
+    if len(keep) <= limit:
+        return keep
+    days = pd.to_datetime(ds).values[keep].astype('datetime64[s]').astype(np.int64) / 86400.0
+    return keep[lttb(days, values[keep], limit)]
+
+
+# Dates as compact YYYY-MM-DD strings (plotly has no binary date encoding), or full timestamps
+# for intraday data
+def encode_dates(ds):
+    values = pd.to_datetime(pd.Series(ds)).values
+    days = values.astype('datetime64[D]')
+    unit = 'D' if (days == values).all() else 's'
+    return np.datetime_as_string(values, unit=unit)
+
+
+# Trace arrays for one x series and several y series sharing its rows: x as short date strings,
+# each y as float32 so plotly writes it as a base64 typed array half the size of float64
+def trace_data(ds, *columns, width_px=CHART_WIDTH_PX):
+    rows = downsample_index(ds, columns[0], width_px)
+    x = encode_dates(pd.to_datetime(ds).values[rows])
+    ys = [np.asarray(column, dtype=np.float32)[rows] for column in columns]
+    return x, ys
+
+
+# Chart div for the page. Skips the second validation pass to_html would run over a figure plotly
+# already validated while it was built; plotly serializes with orjson when it is installed.
+def figure_html(fig):
+    return pio.to_html(fig, full_html=False, include_plotlyjs='cdn', validate=False)
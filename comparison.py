@@ -0,0 +1,109 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import plotly.graph_objs as go
+
+from chart_payload import trace_data
+from engines import DEFAULT_ENGINE, get_engine, training_frame
+from price_cache import PRICE_CACHE
+
+logger = logging.getLogger(__name__)
+
+MIN_COMPARE = 2
+MAX_COMPARE = 8
+
+COLORS = ['#3b82f6', '#f97316', '#10b981', '#ec4899', '#facc15', '#a855f7', '#14b8a6', '#ef4444']
+
+
+# Fetch, fit and predict one ticker; runs on a comparison pool thread
+def forecast_one(ticker, start_date, period, interval_width, interval_mode, engine=DEFAULT_ENGINE):
+    timings = {}
+    started = time.perf_counter()
+    data = PRICE_CACHE.get(ticker, start_date)
+    df_train = training_frame(data)
+    if df_train.shape[0] < 2:
+        raise ValueError(f"No or insufficient data found for stock symbol {ticker}")
+    timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model = get_engine(engine).fit_cached(ticker, df_train, interval_width)
+    timings["fit"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    forecast, _ = get_engine(engine).predict(model, period, interval_mode, "none")
+    timings["predict"] = time.perf_counter() - started
+    return {"ticker": ticker, "history": df_train, "forecast": forecast, "timings": timings}
+
+
+# Run every ticker's pipeline concurrently so wall time tracks the slowest ticker, not the sum
+def run_comparison(tickers, start_date, period, interval_width, interval_mode, engine=DEFAULT_ENGINE):
+    if not MIN_COMPARE <= len(tickers) <= MAX_COMPARE:
+        raise ValueError(f"Comparison needs between {MIN_COMPARE} and {MAX_COMPARE} tickers.")
+    results, errors = [], {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(tickers), thread_name_prefix="compare") as pool:
+        futures = [(t, pool.submit(forecast_one, t, start_date, period, interval_width, interval_mode, engine)) for t in tickers]
+        for ticker, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning(f"Comparison forecast failed for {ticker}: {str(e)}")
+                errors[ticker] = str(e)
+    return results, errors, time.perf_counter() - started
+
+
+# Overlay histories and forecasts rebased to 100 at each ticker's last close
+def build_comparison_figure(results, title, show_bounds=True):
+    fig = go.Figure()
+    for i, result in enumerate(results):
+        color = COLORS[i % len(COLORS)]
+        history, forecast = result["history"], result["forecast"]
+        base = float(history['y'].iloc[-1])
+        name = result["ticker"].replace('.NS', '')
+        history_x, (history_y,) = trace_data(history['ds'], history['y'] / base * 100)
+        forecast_x, (yhat, yhat_upper, yhat_lower) = trace_data(
+            forecast['ds'], forecast['yhat'] / base * 100,
+            forecast['yhat_upper'] / base * 100, forecast['yhat_lower'] / base * 100)
+
+        fig.add_trace(go.Scatter(
+            x=history_x, y=history_y,
+            mode='lines', name=f"{name} Historical",
+            line=dict(color=color, width=1.5),
+            hovertemplate=f'{name}: ' + '%{y:.1f}<br>%{x|%Y-%m-%d}'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast_x, y=yhat,
+            mode='lines', name=f"{name} Forecast",
+            line=dict(color=color, width=2, dash='dash'),
+            hovertemplate=f'{name} forecast: ' + '%{y:.1f}<br>%{x|%Y-%m-%d}'
+        ))
+        if show_bounds:
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([forecast_x, forecast_x[::-1]]),
+                y=np.concatenate([yhat_upper, yhat_lower[::-1]]),
+                fill='toself', fillcolor=color, opacity=0.12,
+                line=dict(width=0), hoverinfo='skip', showlegend=False
+            ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title='Price (last close = 100)',
+        template='plotly_dark',
+        hovermode='x unified',
+        hoverlabel=dict(
+            bgcolor='rgba(0, 0, 0, 0.9)',
+            font=dict(color='white', family='Poppins', size=13),
+            bordercolor='#3b82f6'
+        ),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=60, b=20),
+        font=dict(family="Poppins", color="#ffffff"),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(gridcolor='rgba(255, 255, 255, 0.1)'),
+        yaxis=dict(gridcolor='rgba(255, 255, 255, 0.1)')
+    )
+    return fig
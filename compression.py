@@ -0,0 +1,57 @@
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this go out as they are; compressing them saves less than the header costs
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "500"))
+# Levels for responses compressed per request; static assets are compressed once at the maximum
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ("text/html", "application/json", "text/css", "text/javascript", "application/javascript")
+
+
+# Preferred encodings first; brotli only when the package is installed
+def supported_encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+# Best encoding the client accepts (q-values honoured, ties going to brotli), or None for identity
+def choose_encoding(accept_encodings=None):
+    if accept_encodings is None:
+        accept_encodings = request.accept_encodings
+    return accept_encodings.best_match(supported_encodings())
+
+
+def compress(data, encoding, gzip_level=COMPRESS_GZIP_LEVEL, brotli_quality=COMPRESS_BROTLI_QUALITY):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+# after_request hook compressing buffered HTML and JSON. Streamed responses (downloads, SSE) and files
+# are left alone, since compressing them would buffer what is meant to go out incrementally.
+def compress_response(response):
+    if (response.mimetype not in COMPRESSIBLE_TYPES or response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding()
+    data = response.get_data()
+    if encoding is None or len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The bytes now differ per encoding, so a strong validator would no longer be accurate
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
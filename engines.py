@@ -0,0 +1,196 @@
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import intervals
+
+DEFAULT_ENGINE = os.environ.get("FORECAST_ENGINE", "prophet")
+
+# Forecast horizons as the apps offer them: days as-is, months of 30 days, years of 365 days
+HORIZON_DAYS = {"days": 1, "months": 30, "years": 365}
+
+
+def horizon_days(period_type, period_value):
+    period_type = period_type.lower()
+    if period_type not in HORIZON_DAYS:
+        raise ValueError(f"Unknown period type {period_type}; expected one of {', '.join(HORIZON_DAYS)}")
+    return HORIZON_DAYS[period_type] * int(period_value)
+
+
+# Training frame every engine takes, from an OHLCV history indexed by date: tz-naive ds, numeric Close
+# as y, rows without a close dropped
+def training_frame(data):
+    df_train = data[['Close']].reset_index()
+    df_train.columns = ["ds", "y"]
+    df_train['ds'] = pd.to_datetime(df_train['ds'])
+    if df_train['ds'].dt.tz is not None:
+        df_train['ds'] = df_train['ds'].dt.tz_localize(None)
+    df_train['y'] = pd.to_numeric(df_train['y'], errors='coerce')
+    return df_train.dropna(subset=['y'])
+
+
+# Every engine takes the Prophet-style training frame (ds, y). fit returns an engine-specific model,
+# fit_cached the same through whatever model cache the engine keeps. predict and forecast return
+# (forecast, history_rows): a frame with ds, yhat, yhat_lower, yhat_upper whose first history_rows
+# rows are in-sample fits.
+class ProphetEngine:
+    name = "prophet"
+    label = "Prophet (detailed)"
+
+    def fit(self, df_train, interval_width):
+        from model_cache import fit_prophet
+        return fit_prophet(df_train, interval_width)
+
+    def predict(self, m, periods, interval_mode=intervals.DEFAULT_INTERVAL_MODE,
+                insample=intervals.DEFAULT_INSAMPLE_MODE):
+        return intervals.predict_horizon(m, periods, interval_mode, insample)
+
+    # Fitted model from the shared model cache, fitting only on a miss
+    def fit_cached(self, ticker, df_train, interval_width):
+        from model_cache import MODEL_CACHE
+        return MODEL_CACHE.get_or_fit(ticker, df_train, interval_width)
+
+    def forecast(self, ticker, df_train, periods, interval_width, interval_mode=intervals.DEFAULT_INTERVAL_MODE,
+                 insample=intervals.DEFAULT_INSAMPLE_MODE):
+        return self.predict(self.fit_cached(ticker, df_train, interval_width), periods, interval_mode, insample)
+
+
+# Piecewise-linear trend plus yearly and weekly Fourier seasonality, solved as one ridge-regularized
+# least-squares problem. Mirrors Prophet's default model structure without Stan, so a fit is one
+# small dense solve. Changepoints are spaced more densely towards the end of the history, and the
+# forecast starts from the level of the last anchor_rows closes rather than from wherever the smooth
+# fit ends. The interval widens with the horizon: a random walk at the recent daily volatility, the
+# error of the last segment's slope carried forward, and Prophet's closed-form variance for future
+# changes of that slope.
+class LinearSeasonalEngine:
+    name = "numpy"
+    label = "Fast linear + seasonality (NumPy)"
+
+    def __init__(self, n_changepoints=25, changepoint_range=0.95, yearly_order=10, weekly_order=3,
+                 changepoint_penalty=1.0, seasonality_penalty=0.1, anchor_rows=5, volatility_rows=250):
+        self.n_changepoints = n_changepoints
+        self.changepoint_range = changepoint_range
+        self.yearly_order = yearly_order
+        self.weekly_order = weekly_order
+        self.changepoint_penalty = changepoint_penalty
+        self.seasonality_penalty = seasonality_penalty
+        self.anchor_rows = anchor_rows
+        self.volatility_rows = volatility_rows
+
+    @staticmethod
+    def _fourier(days, period, order):
+        angles = 2 * np.pi * np.outer(days, np.arange(1, order + 1)) / period
+        return np.hstack([np.sin(angles), np.cos(angles)])
+
+    def _design(self, t, days, changepoints):
+        hinges = np.maximum(t[:, None] - changepoints[None, :], 0.0)
+        return np.hstack([
+            np.ones((len(t), 1)),
+            t[:, None],
+            hinges,
+            self._fourier(days, 365.25, self.yearly_order),
+            self._fourier(days, 7.0, self.weekly_order),
+        ])
+
+    # Changepoint positions in (0, changepoint_range), the gaps between them shrinking towards the end
+    def _changepoints(self, n_changepoints):
+        u = np.linspace(0, 1, n_changepoints + 2)[1:-1]
+        return self.changepoint_range * (1 - (1 - u) ** 2)
+
+    def fit(self, df_train, interval_width):
+        ds = pd.to_datetime(df_train['ds']).values.astype('datetime64[D]')
+        y = df_train['y'].values.astype(float)
+        origin = ds[0]
+        span = max(int((ds[-1] - origin).astype(int)), 1)
+        y_scale = float(np.max(np.abs(y))) or 1.0
+
+        days = (ds - origin).astype(int).astype(float)
+        n_changepoints = min(self.n_changepoints, max(len(y) - 2, 0))
+        changepoints = self._changepoints(n_changepoints)
+
+        X = self._design(days / span, days, changepoints)
+        penalty = np.concatenate([
+            [0.0, 0.0],
+            np.full(len(changepoints), self.changepoint_penalty),
+            np.full(X.shape[1] - 2 - len(changepoints), self.seasonality_penalty),
+        ])
+        beta = np.linalg.solve(X.T @ X + np.diag(penalty), X.T @ (y / y_scale))
+
+        fitted = X @ beta * y_scale
+        deltas = beta[2:2 + len(changepoints)]
+        # Variance of relative moves per calendar day over the recent rows
+        recent = slice(-min(self.volatility_rows, len(y)), None)
+        returns = np.diff(y[recent]) / y[recent][:-1]
+        elapsed = float(days[recent][-1] - days[recent][0]) if len(returns) else 0.0
+        return {
+            "ds": ds,
+            "fitted": fitted,
+            "origin": origin,
+            "span": span,
+            "y_scale": y_scale,
+            "changepoints": changepoints,
+            "beta": beta,
+            "offset": float(np.mean((y - fitted)[-self.anchor_rows:])),
+            "level": float(y[-1]),
+            "daily_var": float(np.sum(returns ** 2)) / elapsed if elapsed > 0 else 0.0,
+            "sigma": float(np.std(y - fitted)) if len(y) > 1 else 0.0,
+            "last_segment_days": span * (1.0 - (changepoints[-1] if len(changepoints) else 0.0)),
+            "laplace_scale": float(np.mean(np.abs(deltas))) + 1e-8 if len(deltas) else 0.0,
+            "interval_width": interval_width,
+        }
+
+    # Only the closed-form interval exists for this engine, so interval_mode is accepted and ignored
+    def predict(self, model, periods, interval_mode=intervals.DEFAULT_INTERVAL_MODE,
+                insample=intervals.DEFAULT_INSAMPLE_MODE):
+        ds, span, y_scale = model["ds"], model["span"], model["y_scale"]
+        future_ds = ds[-1] + np.arange(1, periods + 1).astype('timedelta64[D]')
+        future_days = (future_ds - model["origin"]).astype(int).astype(float)
+        future_t = future_days / span
+        design = self._design(future_t, future_days, model["changepoints"])
+        yhat = design @ model["beta"] * y_scale + model["offset"]
+
+        # A random walk from the last close, at the recent daily variance
+        steps = (future_ds - ds[-1]).astype(int).astype(float)
+        level_var = model["level"] ** 2 * model["daily_var"]
+        walk_var = level_var * steps
+        # The slope carried forward was estimated over the last segment only; a line fitted to a random
+        # walk over L days has slope variance 6/5 * daily variance / L
+        slope_var = 1.2 * level_var / model["last_segment_days"] * steps ** 2
+        # Future slope changes arrive at the fitted changepoint rate with Laplace-distributed sizes
+        horizon = np.clip(future_t - 1.0, 0.0, None)
+        rate = len(model["changepoints"]) / self.changepoint_range
+        trend_var = rate * 2.0 * model["laplace_scale"] ** 2 * horizon ** 3 / 3.0 * y_scale ** 2
+        future_std = np.sqrt(walk_var + slope_var + trend_var)
+        z = NormalDist().inv_cdf((1 + model["interval_width"]) / 2)
+        sigma = model["sigma"]
+
+        rows = intervals.insample_rows(len(ds), insample)
+        out_ds = np.concatenate([ds[rows], future_ds]).astype('datetime64[ns]')
+        out_yhat = np.concatenate([model["fitted"][rows], yhat])
+        out_std = np.concatenate([np.full(len(rows), sigma), future_std])
+        forecast = pd.DataFrame({
+            'ds': out_ds,
+            'yhat': out_yhat,
+            'yhat_lower': out_yhat - z * out_std,
+            'yhat_upper': out_yhat + z * out_std,
+        })
+        return forecast, len(rows)
+
+    # Fitting is a single small solve, so there is nothing worth caching
+    def fit_cached(self, ticker, df_train, interval_width):
+        return self.fit(df_train, interval_width)
+
+    def forecast(self, ticker, df_train, periods, interval_width, interval_mode=intervals.DEFAULT_INTERVAL_MODE,
+                 insample=intervals.DEFAULT_INSAMPLE_MODE):
+        return self.predict(self.fit_cached(ticker, df_train, interval_width), periods, interval_mode, insample)
+
+
+ENGINES = {engine.name: engine for engine in (ProphetEngine(), LinearSeasonalEngine())}
+
+
+def get_engine(name=DEFAULT_ENGINE):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown forecast engine {name}; expected one of {', '.join(ENGINES)}")
+    return ENGINES[name]
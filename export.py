@@ -0,0 +1,129 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from forecast_store import CompactForecast
+
+# Rows serialized per chunk; memory stays bounded by one chunk however long the export is
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000"))
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "json": ("application/json", "json"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+def validate_format(fmt):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt}; expected one of {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+# DataFrame slices of a forecast record or frame, built one chunk at a time
+def iter_frames(source, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, max(len(source), 1), chunk_rows):
+        stop = start + chunk_rows
+        if isinstance(source, CompactForecast):
+            yield source.to_frame(start, stop)
+        else:
+            yield source.iloc[start:stop]
+
+
+def iter_csv(source, chunk_rows=EXPORT_CHUNK_ROWS):
+    for i, chunk in enumerate(iter_frames(source, chunk_rows)):
+        yield chunk.to_csv(index=False, header=i == 0).encode()
+
+
+# JSON-ready values of one column: dates as YYYY-MM-DD, float32 at the shortest digits that round-trip
+# to the stored value (16.028933, not 16.028932999999999), NaN as null
+def _json_values(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        daily = (values.dt.normalize() == values).all()
+        return values.dt.strftime('%Y-%m-%d' if daily else '%Y-%m-%dT%H:%M:%S').tolist()
+    if values.dtype == np.float32:
+        return [None if text == "nan" else float(text) for text in values.values.astype(str)]
+    if pd.api.types.is_float_dtype(values):
+        return [None if np.isnan(v) else v for v in values.tolist()]
+    return values.tolist()
+
+
+# {"columns": [...], "data": [[row], ...]}, emitted row chunk by row chunk
+def iter_json(source, chunk_rows=EXPORT_CHUNK_ROWS):
+    first = True
+    for chunk in iter_frames(source, chunk_rows):
+        if first:
+            yield ('{"columns":' + json.dumps([str(c) for c in chunk.columns], separators=(",", ":")) + ',"data":[').encode()
+        columns = [_json_values(chunk[column]) for column in chunk.columns]
+        rows = json.dumps([list(row) for row in zip(*columns)], separators=(",", ":"))[1:-1]
+        if rows:
+            yield ((',' if not first else '') + rows).encode()
+        first = False
+    yield b']}'
+
+
+# File-like sink for pyarrow writers that hands back whatever was written since the last drain
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _iter_arrow(source, chunk_rows, open_writer):
+    sink = _ChunkSink()
+    writer = None
+    for chunk in iter_frames(source, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = open_writer(sink, table.schema)
+        writer.write_table(table)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+# One row group per chunk
+def iter_parquet(source, chunk_rows=EXPORT_CHUNK_ROWS):
+    return _iter_arrow(source, chunk_rows, pq.ParquetWriter)
+
+
+# Arrow IPC stream format, one record batch per chunk
+def iter_arrow(source, chunk_rows=EXPORT_CHUNK_ROWS):
+    return _iter_arrow(source, chunk_rows, pa.ipc.new_stream)
+
+
+_WRITERS = {"csv": iter_csv, "json": iter_json, "parquet": iter_parquet, "arrow": iter_arrow}
+
+
+# Encoded chunks of source (a CompactForecast or a DataFrame without a meaningful index) in fmt
+def iter_export(source, fmt="csv", chunk_rows=EXPORT_CHUNK_ROWS):
+    return _WRITERS[validate_format(fmt)](source, chunk_rows)
+
+
+def export_bytes(source, fmt="csv"):
+    return b"".join(iter_export(source, fmt))
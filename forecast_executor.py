@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from intervals import DEFAULT_INSAMPLE_MODE, DEFAULT_INTERVAL_MODE
+
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", str(os.cpu_count() or 2)))
+# Submissions beyond this many queued or running jobs block the caller instead of piling up
+FORECAST_MAX_PENDING = int(os.environ.get("FORECAST_MAX_PENDING", str(FORECAST_WORKERS * 4)))
+
+
+# Runs once per worker so the prophet/cmdstanpy import and Stan model load are paid once
+def _init_worker():
+    from prophet import Prophet
+    Prophet()
+
+
+def _training_frame(ds, y):
+    return pd.DataFrame({'ds': ds.astype('datetime64[ns]'), 'y': y})
+
+
+def _forecast_frame(arrays):
+    ds, yhat, lower, upper = arrays
+    return pd.DataFrame({'ds': ds.astype('datetime64[ns]'), 'yhat': yhat, 'yhat_lower': lower, 'yhat_upper': upper})
+
+
+def _worker_fit(ticker, ds, y, interval_width):
+    from model_cache import MODEL_CACHE
+    MODEL_CACHE.get_or_fit(ticker, _training_frame(ds, y), interval_width)
+
+
+def _worker_predict(ticker, ds, y, interval_width, periods, interval_mode, insample):
+    import intervals
+    from model_cache import MODEL_CACHE
+    m = MODEL_CACHE.get_or_fit(ticker, _training_frame(ds, y), interval_width)
+    forecast, history_rows = intervals.predict_horizon(m, max(periods), interval_mode, insample)
+    results = {}
+    for period in periods:
+        rows = forecast.iloc[:history_rows + period]
+        results[period] = (
+            rows['ds'].values.astype('datetime64[D]'),
+            rows['yhat'].values,
+            rows['yhat_lower'].values,
+            rows['yhat_upper'].values,
+        )
+    return results
+
+
+# Only day-resolution dates and closes cross the process boundary
+def compact(df_train):
+    return df_train['ds'].values.astype('datetime64[D]'), df_train['y'].values.astype(np.float64)
+
+
+# Bounded process pool for Prophet fits and predictions, kept warm across requests
+class ForecastExecutor:
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the web process has threads holding locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def _run(self, fn, *args):
+        with self._slots:
+            return self._get_pool().submit(fn, *args).result()
+
+    # Make sure a fitted model for this training frame is in the shared on-disk model cache
+    def fit(self, ticker, df_train, interval_width):
+        ds, y = compact(df_train)
+        self._run(_worker_fit, ticker, ds, y, interval_width)
+
+    # Forecast frames (ds, yhat, yhat_lower, yhat_upper) for each period, from one predict call
+    def predict(self, ticker, df_train, interval_width, periods, interval_mode=DEFAULT_INTERVAL_MODE,
+                insample=DEFAULT_INSAMPLE_MODE):
+        ds, y = compact(df_train)
+        results = self._run(_worker_predict, ticker, ds, y, interval_width, tuple(periods), interval_mode, insample)
+        return {period: _forecast_frame(arrays) for period, arrays in results.items()}
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+EXECUTOR = ForecastExecutor(FORECAST_WORKERS, FORECAST_MAX_PENDING)
@@ -0,0 +1,193 @@
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Limits for forecast results kept around for /download and the API
+FORECAST_STORE_MAX_ENTRIES = int(os.environ.get("FORECAST_STORE_MAX_ENTRIES", "1000"))
+FORECAST_STORE_MAX_MB = float(os.environ.get("FORECAST_STORE_MAX_MB", "64"))
+FORECAST_STORE_TTL_SECONDS = float(os.environ.get("FORECAST_STORE_TTL_SECONDS", "3600"))
+# One session can only push out its own older results, never another session's
+FORECAST_STORE_MAX_PER_SESSION = int(os.environ.get("FORECAST_STORE_MAX_PER_SESSION", "20"))
+
+# Columns of a forecast as shown in the apps and written by /download
+FORECAST_DATA_COLUMNS = ['Date', 'Forecast', 'Lower Bound', 'Upper Bound']
+
+
+# A daily forecast held as int32 day offsets from a base date plus float32 forecast and bound
+# arrays. Far smaller than the DataFrame it replaces, which is only rebuilt at download time.
+class CompactForecast:
+    __slots__ = ("base", "offsets", "forecast", "lower", "upper")
+
+    def __init__(self, base, offsets, forecast, lower, upper):
+        self.base = base
+        self.offsets = offsets
+        self.forecast = forecast
+        self.lower = lower
+        self.upper = upper
+
+    @classmethod
+    def from_frame(cls, forecast_data):
+        days = forecast_data['Date'].values.astype('datetime64[D]')
+        base = days[0] if len(days) else np.datetime64(0, 'D')
+        values = [forecast_data[column].values.astype(np.float32) for column in FORECAST_DATA_COLUMNS[1:]]
+        return cls(base, (days - base).astype(np.int32), *values)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def empty(self):
+        return len(self.offsets) == 0
+
+    @property
+    def nbytes(self):
+        arrays = (self.offsets, self.forecast, self.lower, self.upper)
+        return sys.getsizeof(self) + sum(sys.getsizeof(a) for a in arrays)
+
+    def dates(self, start=0, stop=None):
+        return (self.base + self.offsets[start:stop].astype('timedelta64[D]')).astype('datetime64[ns]')
+
+    # Rows start:stop as a DataFrame. Values stay float32 so CSV output prints each at the precision
+    # it was stored with.
+    def to_frame(self, start=0, stop=None):
+        columns = (self.dates(start, stop), self.forecast[start:stop], self.lower[start:stop], self.upper[start:stop])
+        return pd.DataFrame(dict(zip(FORECAST_DATA_COLUMNS, columns)))
+
+
+def _nbytes(value):
+    if isinstance(value, CompactForecast):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("session", "value", "nbytes", "expires")
+
+    def __init__(self, session, value, expires):
+        self.session = session
+        self.value = value
+        self.nbytes = _nbytes(value)
+        self.expires = expires
+
+
+# LRU of forecast results keyed by a random id, bounded by entry count, bytes and idle time. An entry
+# stored with a session is only visible to that session; session=None entries are readable by
+# anyone holding the id (API download links). `clock` is the time source TTLs are measured against.
+class ForecastStore:
+    def __init__(self, max_entries, max_bytes, ttl_seconds, max_per_session, clock=time.monotonic):
+        self.clock = clock
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_per_session = max_per_session
+        self._entries = OrderedDict()
+        self._sessions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def put(self, value, session=None):
+        forecast_id = str(uuid.uuid4())
+        entry = _Entry(session, value, self.clock() + self.ttl_seconds)
+        if entry.nbytes > self.max_bytes:
+            logger.info(f"Forecast of {entry.nbytes} bytes exceeds the forecast store budget, not storing")
+            return forecast_id
+        with self._lock:
+            self._expire()
+            owned = self._sessions.get(session)
+            while owned and len(owned) >= self.max_per_session:
+                self._evict(next(iter(owned)))
+            while self._entries and (len(self._entries) >= self.max_entries
+                                     or self._bytes + entry.nbytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+            self._entries[forecast_id] = entry
+            self._bytes += entry.nbytes
+            if session is not None:
+                self._sessions.setdefault(session, OrderedDict())[forecast_id] = None
+        return forecast_id
+
+    # The stored value, or None when it is unknown, expired or belongs to another session
+    def get(self, forecast_id, session=None, pop=False):
+        with self._lock:
+            entry = self._entries.get(forecast_id)
+            if entry is not None and entry.expires <= self.clock():
+                self._remove(forecast_id)
+                self.expirations += 1
+                entry = None
+            if entry is None or (entry.session is not None and entry.session != session):
+                self.misses += 1
+                return None
+            self.hits += 1
+            if pop:
+                self._remove(forecast_id)
+            else:
+                entry.expires = self.clock() + self.ttl_seconds
+                self._entries.move_to_end(forecast_id)
+                if entry.session is not None:
+                    self._sessions[entry.session].move_to_end(forecast_id)
+            return entry.value
+
+    def pop(self, forecast_id, session=None):
+        return self.get(forecast_id, session, pop=True)
+
+    def stats(self):
+        with self._lock:
+            self._expire()
+            return {
+                "entries": len(self._entries),
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # Reads renew the TTL and move the entry to the end, so LRU order is also expiry order and the
+    # scan can stop at the first live entry
+    def _expire(self):
+        now = self.clock()
+        while self._entries:
+            forecast_id, entry = next(iter(self._entries.items()))
+            if entry.expires > now:
+                break
+            self._remove(forecast_id)
+            self.expirations += 1
+
+    def _evict(self, forecast_id):
+        self._remove(forecast_id)
+        self.evictions += 1
+
+    def _remove(self, forecast_id):
+        entry = self._entries.pop(forecast_id)
+        self._bytes -= entry.nbytes
+        if entry.session is not None:
+            owned = self._sessions[entry.session]
+            owned.pop(forecast_id, None)
+            if not owned:
+                del self._sessions[entry.session]
+
+
+FORECAST_STORE = ForecastStore(
+    FORECAST_STORE_MAX_ENTRIES,
+    int(FORECAST_STORE_MAX_MB * 1024 * 1024),
+    FORECAST_STORE_TTL_SECONDS,
+    FORECAST_STORE_MAX_PER_SESSION,
+)
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import date
+
+import kaleido
+
+logger = logging.getLogger(__name__)
+
+# Absolute, so the renderer writes where Flask serves from whatever directory the app was started in
+IMAGE_DIR = os.path.abspath(os.environ.get(
+    "IMAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pridiction of the stock")))
+IMAGE_RENDER_WORKERS = int(os.environ.get("IMAGE_RENDER_WORKERS", "2"))
+IMAGE_WIDTH = 1200
+IMAGE_HEIGHT = 600
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+
+
+# PNG export off the request path. submit() hashes the figure, queues it and returns the file name
+# at once; long-lived worker threads each keep their own kaleido browser open instead of starting
+# Chrome per image. Identical figures share a file name (date, ticker and content hash),
+# so a chart already rendered or queued today is never rendered again.
+class ImageRenderer:
+    def __init__(self, folder, workers, width=IMAGE_WIDTH, height=IMAGE_HEIGHT):
+        self.folder = os.path.abspath(folder)
+        self.workers = workers
+        self.width = width
+        self.height = height
+        self._queue = queue.Queue()
+        self._states = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._day = None
+        self.rendered = 0
+        self.deduplicated = 0
+        self.failed = 0
+
+    def submit(self, fig, ticker):
+        spec = fig.to_json()
+        digest = hashlib.sha256(spec.encode()).hexdigest()[:16]
+        today = date.today().strftime('%Y-%m-%d')
+        name = f"{today}_{ticker.replace('.NS', '')}_{digest}.png"
+        with self._lock:
+            if self._day != today:
+                # Names are dated, so finished entries from earlier days can never be asked for again
+                self._states = {k: v for k, v in self._states.items() if v == PENDING}
+                self._errors.clear()
+                self._day = today
+            if self._states.get(name) in (PENDING, READY) or os.path.exists(os.path.join(self.folder, name)):
+                self._states.setdefault(name, READY)
+                self.deduplicated += 1
+                return name
+            self._states[name] = PENDING
+            self._errors.pop(name, None)
+            self._start()
+        self._queue.put((name, spec))
+        return name
+
+    # pending, ready, failed, or None for names this renderer has never seen and that aren't on disk
+    def status(self, name):
+        with self._lock:
+            state = self._states.get(name)
+        if state is None and os.path.exists(os.path.join(self.folder, name)):
+            return READY
+        return state
+
+    def error(self, name):
+        with self._lock:
+            return self._errors.get(name)
+
+    def stats(self):
+        with self._lock:
+            states = list(self._states.values())
+            return {
+                "workers": len(self._threads),
+                "queued": self._queue.qsize(),
+                "pending": states.count(PENDING),
+                "rendered": self.rendered,
+                "deduplicated": self.deduplicated,
+                "failed": self.failed,
+            }
+
+    # Called with the lock held; workers start with the first image
+    def _start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"image-render-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        asyncio.run(self._serve())
+
+    # One browser per worker, opened on the first job and reopened after a failure. A daemon feeder
+    # thread blocks on the job queue and hands one job at a time to the loop, so an idle worker sleeps
+    # in jobs.get() while the loop stays free to service the browser connection. (asyncio.to_thread
+    # would park the blocking get on a non-daemon executor thread that keeps the process from exiting.)
+    async def _serve(self):
+        jobs = asyncio.Queue()
+        idle = threading.Semaphore(1)
+        name = f"{threading.current_thread().name}-feed"
+        feeder = threading.Thread(target=self._feed, args=(asyncio.get_running_loop(), jobs, idle), name=name, daemon=True)
+        feeder.start()
+        browser = None
+        opts = dict(format="png", width=self.width, height=self.height)
+        while True:
+            name, spec = await jobs.get()
+            path = os.path.join(self.folder, name)
+            try:
+                if browser is None:
+                    browser = kaleido.Kaleido(n=1)
+                    await browser.open()
+                image = await browser.calc_fig(json.loads(spec), opts=opts)
+                os.makedirs(self.folder, exist_ok=True)
+                # Write under a temporary name so the image endpoint never serves half a file
+                with open(path + ".tmp", "wb") as f:
+                    f.write(image)
+                os.replace(path + ".tmp", path)
+                with self._lock:
+                    self._states[name] = READY
+                    self.rendered += 1
+            except Exception as e:
+                logger.error(f"Error saving image {name}: {str(e)}")
+                with self._lock:
+                    self._states[name] = FAILED
+                    self._errors[name] = str(e)
+                    self.failed += 1
+                browser = await self._close(browser)
+            finally:
+                self._queue.task_done()
+                idle.release()
+
+    # Takes the next job only once the worker is idle, so queued images spread across all workers
+    def _feed(self, loop, jobs, idle):
+        while True:
+            idle.acquire()
+            job = self._queue.get()
+            try:
+                loop.call_soon_threadsafe(jobs.put_nowait, job)
+            except RuntimeError:
+                # The worker's loop is gone; leave the job for the other workers
+                self._queue.put(job)
+                self._queue.task_done()
+                return
+
+    @staticmethod
+    async def _close(browser):
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        return None
+
+
+IMAGE_RENDERER = ImageRenderer(IMAGE_DIR, IMAGE_RENDER_WORKERS)
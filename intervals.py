@@ -0,0 +1,116 @@
+import copy
+import math
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# sampled: Prophet's default 1000 simulated trend paths
+# reduced: the same simulation with INTERVAL_REDUCED_SAMPLES paths
+# analytic: closed-form Gaussian approximation computed in NumPy, no simulation
+INTERVAL_MODES = ("sampled", "reduced", "analytic")
+DEFAULT_INTERVAL_MODE = os.environ.get("INTERVAL_MODE", "analytic")
+INTERVAL_REDUCED_SAMPLES = int(os.environ.get("INTERVAL_REDUCED_SAMPLES", "100"))
+SAMPLED_UNCERTAINTY_SAMPLES = 1000
+
+# full: fitted value for every historical day; subsample: at most INSAMPLE_MAX_POINTS of them;
+# none: horizon rows only. The apps store and export the forecast they predict, so they keep every
+# row and leave thinning to the chart (chart_payload); subsample is opt-in, e.g. for batch runs.
+INSAMPLE_MODES = ("full", "subsample", "none")
+DEFAULT_INSAMPLE_MODE = "full"
+INSAMPLE_MAX_POINTS = int(os.environ.get("INSAMPLE_MAX_POINTS", "500"))
+
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def validate_mode(mode):
+    if mode not in INTERVAL_MODES:
+        raise ValueError(f"Unknown interval mode {mode}; expected one of {', '.join(INTERVAL_MODES)}")
+    return mode
+
+
+def _z(m):
+    return NormalDist().inv_cdf((1 + m.interval_width) / 2)
+
+
+def _point_model(m):
+    m = copy.copy(m)
+    m.uncertainty_samples = 0
+    return m
+
+
+# Prophet's interval has two parts: observation noise (sigma_obs) and trend uncertainty from future
+# changepoints, which arrive at the historical changepoint rate with Laplace(0, mean|delta|) rate changes.
+# For a Poisson stream of such changes the trend variance h time units past the history is
+# rate * 2b^2 * h^3 / 3; both parts are combined as a Gaussian.
+def analytic_intervals(m, forecast):
+    params = m.params
+    sigma_obs = float(np.mean(params['sigma_obs'])) * m.y_scale
+    deltas = np.asarray(params['delta'])
+    laplace_scale = float(np.mean(np.abs(deltas))) + 1e-8
+    changepoint_rate = len(m.changepoints_t) if m.changepoints_t is not None else 0
+
+    t = ((forecast['ds'] - m.start) / m.t_scale).values.astype(float)
+    horizon = np.clip(t - 1.0, 0.0, None)
+    trend_var = changepoint_rate * 2.0 * laplace_scale ** 2 * horizon ** 3 / 3.0 * m.y_scale ** 2
+    std = np.sqrt(sigma_obs ** 2 + trend_var)
+
+    z = _z(m)
+    yhat = forecast['yhat'].values
+    forecast = forecast.copy()
+    forecast['yhat_lower'] = yhat - z * std
+    forecast['yhat_upper'] = yhat + z * std
+    return forecast
+
+
+# Predict with the requested interval mode; works on a shallow copy so a shared cached model is untouched
+def predict(m, future, mode=DEFAULT_INTERVAL_MODE):
+    validate_mode(mode)
+    m = copy.copy(m)
+    if mode == "sampled":
+        m.uncertainty_samples = SAMPLED_UNCERTAINTY_SAMPLES
+        return m.predict(future)
+    if mode == "reduced":
+        m.uncertainty_samples = INTERVAL_REDUCED_SAMPLES
+        return m.predict(future)
+    m.uncertainty_samples = 0
+    return analytic_intervals(m, m.predict(future))
+
+
+# Positions of the history rows to report for an in-sample mode
+def insample_rows(n, insample=DEFAULT_INSAMPLE_MODE, max_points=INSAMPLE_MAX_POINTS):
+    if insample not in INSAMPLE_MODES:
+        raise ValueError(f"Unknown in-sample mode {insample}; expected one of {', '.join(INSAMPLE_MODES)}")
+    if insample == "none":
+        return np.arange(0)
+    if insample == "subsample" and n > max_points:
+        step = math.ceil(n / max_points)
+        # Count back from the last bar so the join with the horizon stays continuous
+        return np.arange(n - 1, -1, -step)[::-1]
+    return np.arange(n)
+
+
+# Fitted values over the training history without simulation. Inside the history Prophet's
+# interval is pure observation noise, so the band is yhat +/- z * sigma_obs.
+def insample_fit(m, insample=DEFAULT_INSAMPLE_MODE, max_points=INSAMPLE_MAX_POINTS):
+    if insample == "none":
+        return None
+    history = m.history[['ds']]
+    history = history.iloc[insample_rows(len(history), insample, max_points)]
+    fitted = _point_model(m).predict(history)
+    noise = _z(m) * float(np.mean(m.params['sigma_obs'])) * m.y_scale
+    fitted['yhat_lower'] = fitted['yhat'] - noise
+    fitted['yhat_upper'] = fitted['yhat'] + noise
+    return fitted
+
+
+# Predict only the future window with the requested interval mode, prefixed by cheap in-sample
+# fitted values. Returns the combined frame and the number of in-sample rows at its head.
+def predict_horizon(m, periods, mode=DEFAULT_INTERVAL_MODE, insample=DEFAULT_INSAMPLE_MODE):
+    future = m.make_future_dataframe(periods=periods, include_history=False)
+    forecast = predict(m, future, mode)[FORECAST_COLUMNS]
+    fitted = insample_fit(m, insample)
+    if fitted is None:
+        return forecast.reset_index(drop=True), 0
+    return pd.concat([fitted[FORECAST_COLUMNS], forecast], ignore_index=True), len(fitted)
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Job threads mostly wait on the forecast process pool, so this can exceed the core count
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+# Finished jobs are kept this long for polling clients
+JOB_TTL_SECONDS = float(os.environ.get("JOB_TTL_SECONDS", "900"))
+
+FINISHED = ("done", "failed")
+
+
+class Job:
+    def __init__(self):
+        self.id = str(uuid.uuid4())
+        self.status = "queued"
+        self.stage = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.events = [{"stage": "queued", "elapsed": 0.0}]
+        self._cond = threading.Condition()
+
+    def _push(self, **event):
+        event["elapsed"] = round(time.time() - self.created, 3)
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def advance(self, stage):
+        self.status = "running"
+        self.stage = stage
+        self._push(stage=stage)
+
+    def finish(self, result):
+        self.result = result
+        self.status = self.stage = "done"
+        self.finished = time.time()
+        self._push(stage="done")
+
+    def fail(self, error):
+        self.error = error
+        self.status = self.stage = "failed"
+        self.finished = time.time()
+        self._push(stage="failed", error=error)
+
+    # Yield events from position start on, waiting up to timeout for each new one (None on timeout)
+    def follow(self, start=0, timeout=15):
+        position = start
+        while True:
+            with self._cond:
+                if position >= len(self.events):
+                    self._cond.wait(timeout)
+                pending = self.events[position:]
+            if not pending:
+                yield None
+                continue
+            for event in pending:
+                yield event
+            position += len(pending)
+            if pending[-1]["stage"] in FINISHED:
+                return
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+            "events": list(self.events),
+            "result": self.result,
+        }
+
+
+# Runs fn(job, *args) in the background; fn reports stages through job.advance and returns the result
+class JobManager:
+    def __init__(self, max_workers, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        self._prune()
+        job = Job()
+        with self._lock:
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        try:
+            job.finish(fn(job, *args))
+        except Exception as e:
+            logger.warning(f"Forecast job {job.id} failed: {str(e)}")
+            job.fail(str(e))
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+                del self._jobs[job_id]
+
+
+# Server-Sent Events stream of a job's stage transitions, with keep-alive comments while idle
+def sse_stream(job):
+    for event in job.follow():
+        if event is None:
+            yield ": keep-alive\n\n"
+            continue
+        yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+
+JOBS = JobManager(JOB_WORKERS, JOB_TTL_SECONDS)
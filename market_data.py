@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# yfinance talks to Yahoo; replay serves responses recorded under MARKET_DATA_DIR; synthetic
+# generates deterministic prices, info and financials for any symbol without network access
+MARKET_DATA_PROVIDER = os.environ.get("MARKET_DATA_PROVIDER", "yfinance")
+MARKET_DATA_DIR = os.environ.get("MARKET_DATA_DIR", "market_data")
+# Record every live response into MARKET_DATA_DIR so it can be replayed later
+MARKET_DATA_RECORD = os.environ.get("MARKET_DATA_RECORD", "") == "1"
+SYNTHETIC_SEED = int(os.environ.get("SYNTHETIC_SEED", "0"))
+SYNTHETIC_START = os.environ.get("SYNTHETIC_START", "1995-01-01")
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+FINANCIAL_ROWS = ["Total Revenue", "Gross Profit", "Operating Income", "Net Income"]
+SECTORS = ["Technology", "Financial Services", "Energy", "Consumer Defensive", "Healthcare",
+           "Industrials", "Basic Materials", "Utilities", "Communication Services", "Consumer Cyclical"]
+
+
+# Flatten yfinance output into a sorted, tz-naive frame indexed by Date
+def normalize(raw):
+    frame = raw.copy()
+    if isinstance(frame.columns, pd.MultiIndex):
+        price_level = next(
+            (i for i in range(frame.columns.nlevels) if "Close" in frame.columns.get_level_values(i)), 0
+        )
+        frame.columns = frame.columns.get_level_values(price_level)
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    index = pd.to_datetime(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index.normalize()
+    frame.index.name = "Date"
+    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+    return frame.dropna(subset=["Close"])
+
+
+# Split a multi-ticker download (grouped by ticker) into one frame per symbol
+def split_batch(raw, symbols):
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return {symbols[0]: normalize(raw)} if len(symbols) == 1 else frames
+    available = set(raw.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol not in available:
+            continue
+        frame = raw[symbol].dropna(how="all")
+        if frame.empty:
+            continue
+        frames[symbol] = normalize(frame)
+    return frames
+
+
+# Every provider answers the same three questions. history returns {symbol: frame} with normalized
+# daily bars (PRICE_COLUMNS, Date index, end exclusive) and omits symbols it has nothing for; info
+# returns a yfinance-style info dict; quarterly_financials returns metrics x quarter-end columns.
+class YFinanceProvider:
+    name = "yfinance"
+
+    def history(self, symbols, start, end):
+        if len(symbols) == 1:
+            raw = yf.download(symbols[0], start=start, end=end, actions=True, progress=False)
+        else:
+            raw = yf.download(symbols, start=start, end=end, group_by="ticker",
+                              actions=True, threads=True, progress=False)
+        return split_batch(raw, list(symbols))
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def quarterly_financials(self, symbol):
+        return yf.Ticker(symbol).quarterly_financials
+
+
+# Serves responses recorded by RecordingProvider: <dir>/<symbol>/{history,financials}.parquet and info.json
+class ReplayProvider:
+    name = "replay"
+
+    def __init__(self, directory=MARKET_DATA_DIR):
+        self.directory = directory
+
+    def _path(self, symbol, name):
+        return os.path.join(self.directory, symbol.replace(os.sep, "_").replace("/", "_"), name)
+
+    def history(self, symbols, start, end):
+        frames = {}
+        for symbol in symbols:
+            path = self._path(symbol, "history.parquet")
+            if not os.path.exists(path):
+                continue
+            frame = pd.read_parquet(path)
+            frame = frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+    def info(self, symbol):
+        path = self._path(symbol, "info.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def quarterly_financials(self, symbol):
+        path = self._path(symbol, "financials.parquet")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        # Stored transposed because Parquet needs string column names
+        return pd.read_parquet(path).T
+
+
+# Passes calls through to another provider and saves each response for ReplayProvider
+class RecordingProvider(ReplayProvider):
+    def __init__(self, inner, directory=MARKET_DATA_DIR):
+        super().__init__(directory)
+        self.inner = inner
+        self.name = f"{inner.name}+record"
+
+    def _target(self, symbol, name):
+        path = self._path(symbol, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def history(self, symbols, start, end):
+        frames = self.inner.history(symbols, start, end)
+        for symbol, frame in frames.items():
+            path = self._target(symbol, "history.parquet")
+            if os.path.exists(path):
+                frame = pd.concat([pd.read_parquet(path), frame])
+                frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            frame.to_parquet(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return frames
+
+    def info(self, symbol):
+        info = self.inner.info(symbol)
+        with open(self._target(symbol, "info.json"), "w") as f:
+            json.dump(info, f, default=str)
+        return info
+
+    def quarterly_financials(self, symbol):
+        financials = self.inner.quarterly_financials(symbol)
+        if financials is not None and not financials.empty:
+            financials.T.to_parquet(self._target(symbol, "financials.parquet"))
+        return financials
+
+
+# Deterministic per-symbol market: the same symbol always gets the same drift, volatility regime,
+# dividends and splits, so delta syncs line up and results are reproducible. Prices are
+# split-adjusted like yfinance's, with the split itself only reported in Stock Splits.
+class SyntheticProvider:
+    name = "synthetic"
+
+    def __init__(self, seed=SYNTHETIC_SEED, start=SYNTHETIC_START):
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+
+    def _rng(self, symbol, salt=""):
+        digest = hashlib.sha256(f"{self.seed}:{symbol}:{salt}".encode()).digest()
+        return np.random.default_rng(int.from_bytes(digest[:8], "little"))
+
+    def _profile(self, symbol):
+        rng = self._rng(symbol, "profile")
+        return {
+            "price": float(np.exp(rng.uniform(np.log(20), np.log(3000)))),
+            "drift": float(rng.normal(0.06, 0.04)) / 252,
+            "vol": float(rng.uniform(0.15, 0.4)) / np.sqrt(252),
+            "shares": float(np.exp(rng.uniform(np.log(5e7), np.log(5e9)))),
+            "margin": float(rng.uniform(0.03, 0.25)),
+            "dividend_yield": float(rng.choice([0.0, rng.uniform(0.005, 0.04)])),
+            "sector": SECTORS[int(rng.integers(len(SECTORS)))],
+        }
+
+    # Full bar history from self.start to today. Each series draws from its own stream and depends
+    # only on earlier days, so a later call only appends bars and never rewrites stored history.
+    def _bars(self, symbol):
+        profile = self._profile(symbol)
+        index = pd.bdate_range(self.start, pd.Timestamp(date.today()), name="Date")
+        n = len(index)
+
+        # Slowly varying volatility regime around the symbol's base volatility
+        regime = np.exp(np.convolve(self._rng(symbol, "regime").normal(0, 0.02, n), np.ones(20))[:n])
+        shocks = self._rng(symbol, "returns").standard_t(5, n) / np.sqrt(5 / 3)
+        returns = profile["drift"] - (profile["vol"] * regime) ** 2 / 2 + profile["vol"] * regime * shocks
+        close = profile["price"] * np.exp(np.cumsum(returns))
+
+        # One stream per column: draws sharing a stream would shift whenever n grows by a day
+        open_ = close * np.exp(-returns * self._rng(symbol, "open").uniform(0, 1, n))
+        high_range = np.abs(self._rng(symbol, "high").normal(0, 0.6, n))
+        low_range = np.abs(self._rng(symbol, "low").normal(0, 0.6, n))
+        high = np.maximum(open_, close) * (1 + profile["vol"] * regime * high_range)
+        low = np.minimum(open_, close) * (1 - profile["vol"] * regime * low_range)
+        noise = self._rng(symbol, "volume").normal(0, 0.4, n)
+        volume = profile["shares"] * 0.002 * np.exp(noise) * (1 + 20 * np.abs(returns))
+
+        dividends = np.zeros(n)
+        if profile["dividend_yield"]:
+            quarter_starts = np.flatnonzero(np.diff(index.quarter, prepend=index.quarter[0]) != 0)
+            dividends[quarter_starts] = close[quarter_starts] * profile["dividend_yield"] / 4
+        splits = np.zeros(n)
+        split_rng = self._rng(symbol, "split")
+        split_day = int(split_rng.integers(250, 8000))
+        if split_rng.uniform() < 0.3 and split_day < n:
+            splits[split_day] = float(split_rng.choice([2.0, 5.0, 10.0]))
+
+        return pd.DataFrame({
+            "Open": open_, "High": high, "Low": low, "Close": close,
+            "Volume": volume.round(), "Dividends": dividends, "Stock Splits": splits,
+        }, index=index)
+
+    def history(self, symbols, start, end):
+        frames = {}
+        for symbol in symbols:
+            frame = self._bars(symbol)
+            frame = frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+    def info(self, symbol):
+        profile = self._profile(symbol)
+        last = float(self._bars(symbol)["Close"].iloc[-1])
+        earnings = last * profile["shares"] * profile["margin"] / 4
+        base = symbol.split(".")[0]
+        return {
+            "symbol": symbol,
+            "longName": f"{base.title()} Synthetic Ltd",
+            "sector": profile["sector"],
+            "currency": "INR" if symbol.endswith((".NS", ".BO")) else "USD",
+            "regularMarketPrice": round(last, 2),
+            "marketCap": int(last * profile["shares"]),
+            "trailingPE": round(last * profile["shares"] / max(earnings * 4, 1.0), 2),
+            "dividendYield": profile["dividend_yield"],
+        }
+
+    def quarterly_financials(self, symbol):
+        profile = self._profile(symbol)
+        rng = self._rng(symbol, "financials")
+        quarters = pd.date_range(end=pd.Timestamp(date.today()), periods=5, freq="QE")[::-1]
+        revenue = profile["price"] * profile["shares"] * 0.05 * np.exp(rng.normal(0, 0.08, len(quarters)))
+        gross = revenue * rng.uniform(0.3, 0.6)
+        operating = gross * rng.uniform(0.3, 0.7)
+        net = revenue * profile["margin"] * np.exp(rng.normal(0, 0.3, len(quarters)))
+        return pd.DataFrame([revenue, gross, operating, net], index=FINANCIAL_ROWS, columns=quarters)
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    ReplayProvider.name: ReplayProvider,
+    SyntheticProvider.name: SyntheticProvider,
+}
+
+
+def make_provider(name=MARKET_DATA_PROVIDER, record=MARKET_DATA_RECORD):
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown market data provider {name}; expected one of {', '.join(PROVIDERS)}")
+    provider = PROVIDERS[name]()
+    if record and name != ReplayProvider.name:
+        provider = RecordingProvider(provider)
+    return provider
+
+
+# Call sites go through this module attribute, so a benchmark or load test can swap it at runtime
+PROVIDER = make_provider()
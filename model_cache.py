@@ -0,0 +1,191 @@
+import glob
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from prophet.serialize import model_from_json, model_to_json
+
+logger = logging.getLogger(__name__)
+
+# Fitted models are serialized here so every worker process can reuse them
+MODEL_CACHE_DIR = os.environ.get("MODEL_CACHE_DIR", "model_cache")
+MODEL_CACHE_MAX_ENTRIES = int(os.environ.get("MODEL_CACHE_MAX_ENTRIES", "32"))
+# Start Stan from the previous fit when the history only grew at the end
+MODEL_WARM_START = os.environ.get("MODEL_WARM_START", "1") == "1"
+
+
+def model_key(ticker, df_train, interval_width):
+    return (
+        ticker,
+        pd.Timestamp(df_train['ds'].iloc[-1]).strftime("%Y-%m-%d"),
+        pd.Timestamp(df_train['ds'].iloc[0]).strftime("%Y-%m-%d"),
+        round(float(interval_width), 4),
+    )
+
+
+# Content hash of the training data, so revised history (e.g. after a split) never reuses a stale fit
+def fingerprint(df_train):
+    return format(int(pd.util.hash_pandas_object(df_train[['ds', 'y']], index=False).sum()), "x")
+
+
+def fit_prophet(df_train, interval_width, init=None):
+    m = Prophet(interval_width=interval_width)
+    if init is not None:
+        m.fit(df_train, init=init)
+    else:
+        m.fit(df_train)
+    return m
+
+
+# Optimizer starting point taken from a fitted model (MAP fit, so one draw per parameter)
+def warm_start_params(m):
+    return {
+        'k': m.params['k'][0][0],
+        'm': m.params['m'][0][0],
+        'sigma_obs': m.params['sigma_obs'][0][0],
+        'delta': m.params['delta'][0],
+        'beta': m.params['beta'][0],
+    }
+
+
+# True when df_train is the model's training history with new bars appended at the end
+def is_append_only(m, df_train):
+    history = m.history
+    if history is None or len(df_train) <= len(history):
+        return False
+    head = df_train.iloc[:len(history)]
+    same_dates = np.array_equal(pd.to_datetime(head['ds']).values, pd.to_datetime(history['ds']).values)
+    return same_dates and np.allclose(head['y'].values, history['y'].values, rtol=1e-9, atol=0)
+
+
+# Fitted Prophet models keyed by (ticker, last training date, training start, interval_width).
+# A model does not depend on the forecast horizon, so one fit serves every period.
+class ModelCache:
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.warm_fits = 0
+
+    def _path(self, key):
+        ticker, last, start, width = key
+        name = f"{ticker.replace(os.sep, '_')}_{last}_{start}_{int(width * 10000)}.json"
+        return os.path.join(self.directory, name)
+
+    def _remember(self, key, digest, m):
+        with self._lock:
+            self._models[key] = (digest, m)
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+
+    def _load(self, key, digest):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            if payload.get("fingerprint") != digest:
+                return None
+            return model_from_json(payload["model"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached model {path}: {str(e)}")
+            return None
+
+    def _save(self, key, digest, m):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            with open(path + ".tmp", "w") as f:
+                json.dump({"fingerprint": digest, "model": model_to_json(m)}, f)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logger.warning(f"Could not persist fitted model: {str(e)}")
+            return
+        # Older fits of the same series are only useful as warm starts, which use the newest one
+        for old_key, old_path in self._series_files(key):
+            if old_key[1] < key[1]:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    # Persisted (key, path) pairs sharing ticker, training start and interval width with key
+    def _series_files(self, key):
+        ticker, _, start, width = key
+        pattern = self._path((ticker, "*", start, width))
+        for path in glob.glob(pattern):
+            name = os.path.basename(path)[:-len(".json")]
+            parts = name.rsplit("_", 3)
+            if len(parts) == 4 and parts[0] == ticker.replace(os.sep, '_'):
+                yield (ticker, parts[1], start, width), path
+
+    # Most recent fit of the same series trained on data ending before df_train does
+    def previous(self, ticker, df_train, interval_width):
+        key = model_key(ticker, df_train, interval_width)
+        with self._lock:
+            older = [k for k in self._models if k[0] == key[0] and k[2:] == key[2:] and k[1] < key[1]]
+            if older:
+                return self._models[max(older, key=lambda k: k[1])][1]
+        older = [(k, path) for k, path in self._series_files(key) if k[1] < key[1]]
+        if not older:
+            return None
+        _, path = max(older, key=lambda item: item[0][1])
+        try:
+            with open(path) as f:
+                return model_from_json(json.load(f)["model"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached model {path}: {str(e)}")
+            return None
+
+    def get(self, ticker, df_train, interval_width):
+        key = model_key(ticker, df_train, interval_width)
+        digest = fingerprint(df_train)
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is not None and cached[0] == digest:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+        m = self._load(key, digest)
+        if m is not None:
+            self._remember(key, digest, m)
+            with self._lock:
+                self.hits += 1
+        return m
+
+    def get_or_fit(self, ticker, df_train, interval_width):
+        m = self.get(ticker, df_train, interval_width)
+        if m is not None:
+            return m
+        with self._lock:
+            self.misses += 1
+        init = None
+        if MODEL_WARM_START:
+            previous = self.previous(ticker, df_train, interval_width)
+            if previous is not None and is_append_only(previous, df_train):
+                init = warm_start_params(previous)
+                with self._lock:
+                    self.warm_fits += 1
+        m = fit_prophet(df_train, interval_width, init=init)
+        key = model_key(ticker, df_train, interval_width)
+        digest = fingerprint(df_train)
+        self._remember(key, digest, m)
+        self._save(key, digest, m)
+        return m
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._models), "hits": self.hits, "misses": self.misses, "warm_fits": self.warm_fits}
+
+
+MODEL_CACHE = ModelCache(MODEL_CACHE_DIR, MODEL_CACHE_MAX_ENTRIES)
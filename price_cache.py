@@ -0,0 +1,74 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+
+import price_store
+
+logger = logging.getLogger(__name__)
+
+# Memory ceiling for cached histories across all tickers
+PRICE_CACHE_MAX_MB = float(os.environ.get("PRICE_CACHE_MAX_MB", "256"))
+
+
+class _Entry:
+    __slots__ = ("start", "synced", "frame", "nbytes")
+
+    def __init__(self, start, synced, frame):
+        self.start = start
+        self.synced = synced
+        self.frame = frame
+        self.nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+
+
+# LRU of per-ticker histories; each entry holds the widest range requested so far
+class PriceCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, ticker, start=price_store.DEFAULT_START):
+        start = pd.Timestamp(start)
+        today = date.today()
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and entry.synced == today and entry.start <= start:
+                self._entries.move_to_end(ticker)
+                return self._slice(entry.frame, start)
+        widest = min(start, entry.start) if entry is not None else start
+        frame = price_store.get_history(ticker, widest)
+        if not frame.empty:
+            self.put(ticker, frame, widest)
+        return self._slice(frame, start)
+
+    def put(self, ticker, frame, start):
+        entry = _Entry(pd.Timestamp(start), date.today(), frame)
+        with self._lock:
+            old = self._entries.pop(ticker, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if entry.nbytes > self.max_bytes:
+                logger.info(f"History for {ticker} exceeds the price cache budget, not caching")
+                return
+            while self._entries and self._bytes + entry.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+            self._entries[ticker] = entry
+            self._bytes += entry.nbytes
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    # Positional slicing on a sorted index returns a view, not a copy
+    @staticmethod
+    def _slice(frame, start):
+        return frame.iloc[frame.index.searchsorted(start):]
+
+
+PRICE_CACHE = PriceCache(int(PRICE_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+import market_data
+
+logger = logging.getLogger(__name__)
+
+# One Parquet file per ticker plus a small JSON sidecar with sync metadata
+STORE_DIR = os.environ.get("PRICE_STORE_DIR", "price_data")
+
+# Only the columns the pipeline reads: Close for Prophet, OHLCV for the Streamlit table
+STORED_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+ACTION_COLUMNS = ["Dividends", "Stock Splits"]
+
+# Relative change of an already stored close that means the provider re-adjusted history
+ADJUSTMENT_TOLERANCE = 1e-3
+
+DEFAULT_START = "2018-01-01"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _ticker_lock(ticker):
+    with _locks_guard:
+        return _locks.setdefault(ticker, threading.Lock())
+
+
+def _paths(ticker):
+    name = ticker.replace(os.sep, "_").replace("/", "_")
+    return os.path.join(STORE_DIR, f"{name}.parquet"), os.path.join(STORE_DIR, f"{name}.json")
+
+
+def _read(ticker):
+    data_path, meta_path = _paths(ticker)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, {}
+    try:
+        frame = pd.read_parquet(data_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return frame, meta
+    except Exception as e:
+        logger.warning(f"Discarding unreadable price store entry for {ticker}: {str(e)}")
+        return None, {}
+
+
+def _write(ticker, frame, meta):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    data_path, meta_path = _paths(ticker)
+    # Write to temp files first so concurrent readers never see a half-written partition
+    frame.to_parquet(data_path + ".tmp")
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _download(ticker, start, end):
+    frame = market_data.PROVIDER.history([ticker], start, end).get(ticker)
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=STORED_COLUMNS + ACTION_COLUMNS)
+    return frame
+
+
+def _columns(frame):
+    return frame[[c for c in STORED_COLUMNS if c in frame.columns]]
+
+
+# True when the overlapping bars moved or a corporate action landed in the new bars
+def _adjusted(stored, fresh):
+    overlap = stored.index.intersection(fresh.index)
+    if len(overlap):
+        old = stored.loc[overlap, "Close"].astype(float)
+        new = fresh.loc[overlap, "Close"].astype(float)
+        if ((new - old).abs() / old.abs()).max() > ADJUSTMENT_TOLERANCE:
+            return True
+    new_rows = fresh[fresh.index > stored.index[-1]]
+    for column in ACTION_COLUMNS:
+        if column in new_rows.columns and (new_rows[column].fillna(0) != 0).any():
+            return True
+    return False
+
+
+def _full_sync(ticker, start, today):
+    fresh = _download(ticker, start, today)
+    if fresh.empty:
+        return None
+    frame = _columns(fresh)
+    _write(ticker, frame, {"start": start, "synced": today})
+    return frame
+
+
+def _delta_sync(ticker, frame, meta, today):
+    last = frame.index[-1].strftime("%Y-%m-%d")
+    fresh = None
+    if last < today:
+        try:
+            fresh = _download(ticker, last, today)
+        except Exception as e:
+            logger.warning(f"Delta sync failed for {ticker}, serving stored history: {str(e)}")
+            return frame
+    return _apply_delta(ticker, frame, meta, fresh, today)
+
+
+# Merge bars fetched from the last stored bar (or earlier) into the stored frame, reloading the whole
+# history instead when they show an adjustment
+def _apply_delta(ticker, frame, meta, fresh, today):
+    if fresh is not None and not fresh.empty:
+        if _adjusted(frame, fresh):
+            logger.info(f"Split/dividend adjustment detected for {ticker}, reloading history")
+            return _full_sync(ticker, meta["start"], today)
+        frame = pd.concat([frame[frame.index < fresh.index[0]], _columns(fresh)])
+    _write(ticker, frame, {"start": meta["start"], "synced": today})
+    return frame
+
+
+# Return stored OHLCV history for ticker from start, fetching only bars we don't have yet
+def get_history(ticker, start=DEFAULT_START):
+    start = pd.Timestamp(start).strftime("%Y-%m-%d")
+    today = date.today().strftime("%Y-%m-%d")
+    with _ticker_lock(ticker):
+        frame, meta = _read(ticker)
+        if frame is None or frame.empty or start < meta.get("start", start):
+            frame = _full_sync(ticker, min(start, meta.get("start", start)), today)
+        elif meta.get("synced") != today:
+            frame = _delta_sync(ticker, frame, meta, today)
+    if frame is None:
+        return pd.DataFrame(columns=STORED_COLUMNS)
+    return frame.loc[start:]
+
+
+# Stored history only, never touching the network (empty if the ticker was never synced)
+def read_history(ticker, start=DEFAULT_START):
+    frame, _ = _read(ticker)
+    if frame is None:
+        return pd.DataFrame(columns=STORED_COLUMNS)
+    return frame.loc[pd.Timestamp(start):]
+
+
+# Provider bars from start through `through` inclusive, not stored. The store only takes a day's bar
+# once the day is over, so this is how a job running after the close sees that session's bar.
+def fetch_bars(ticker, start, through):
+    end = (pd.Timestamp(through) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    return _columns(_download(ticker, pd.Timestamp(start).strftime("%Y-%m-%d"), end))
+
+
+# True when get_history(ticker, start) would have to download the whole range rather than a delta
+def needs_full_sync(ticker, start=DEFAULT_START):
+    _, meta_path = _paths(ticker)
+    try:
+        with open(meta_path) as f:
+            stored_start = json.load(f)["start"]
+    except (OSError, ValueError, KeyError):
+        return True
+    return pd.Timestamp(start).strftime("%Y-%m-%d") < stored_start
+
+
+# First day a delta sync of ticker would download (its last stored bar), or None when there is no
+# delta to fetch: the ticker needs a full sync from start, or it is already synced today
+def delta_start(ticker, start=DEFAULT_START):
+    start = pd.Timestamp(start).strftime("%Y-%m-%d")
+    today = date.today().strftime("%Y-%m-%d")
+    frame, meta = _read(ticker)
+    if frame is None or frame.empty or start < meta.get("start", start) or meta.get("synced") == today:
+        return None
+    last = frame.index[-1].strftime("%Y-%m-%d")
+    return last if last < today else None
+
+
+# Delta sync of a ticker from bars a batched download already fetched, starting at or before its
+# delta_start. A ticker missing from the batch had no new bars and is only marked synced.
+def put_delta(ticker, fresh):
+    today = date.today().strftime("%Y-%m-%d")
+    with _ticker_lock(ticker):
+        frame, meta = _read(ticker)
+        if frame is None or frame.empty:
+            return None
+        return _apply_delta(ticker, frame, meta, fresh, today)
+
+
+# Store a ticker's history from a batched download. Bars before the frame that an earlier sync from
+# an earlier start already stored are kept, so the stored range never shrinks.
+def put_history(ticker, frame, start=DEFAULT_START):
+    today = date.today().strftime("%Y-%m-%d")
+    start = pd.Timestamp(start).strftime("%Y-%m-%d")
+    frame = _columns(frame)
+    with _ticker_lock(ticker):
+        stored, meta = _read(ticker)
+        if stored is not None and not stored.empty and meta.get("start", start) < start:
+            if not frame.empty:
+                stored = stored[stored.index < frame.index[0]]
+            frame = pd.concat([stored, frame])
+            start = meta["start"]
+        _write(ticker, frame, {"start": start, "synced": today})
+    return frame
+
+
+def invalidate(ticker):
+    with _ticker_lock(ticker):
+        for path in _paths(ticker):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+
+# Next occurrence of HH:MM in the given timezone, strictly after now
+def next_run_time(run_at, tz, now=None):
+    hour, minute = (int(part) for part in run_at.split(":"))
+    now = now or datetime.now(ZoneInfo(tz))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+# Trading session whose close bar should be published at `now`: today once run_at has passed, else
+# the day before. Weekends and holidays need no special case, since a session without a bar simply
+# leaves the history ending on the previous one.
+def session_date(run_at, tz, now=None):
+    now = now or datetime.now(ZoneInfo(tz))
+    hour, minute = (int(part) for part in run_at.split(":"))
+    if (now.hour, now.minute) < (hour, minute):
+        now -= timedelta(days=1)
+    return now.strftime("%Y-%m-%d")
+
+
+# Runs task(symbol, session) for every symbol once at start and then daily at run_at, keeping the
+# latest results in memory. session is the date of the last closed trading session (see
+# session_date); task returns (results, timings): results maps cache keys to payloads, timings maps
+# stage to seconds.
+class PrecomputeScheduler:
+    def __init__(self, task, symbols, run_at="16:00", tz="Asia/Kolkata", max_workers=2, before_run=None):
+        self.task = task
+        self.symbols = symbols
+        self.run_at = run_at
+        self.tz = tz
+        self.max_workers = max_workers
+        self.before_run = before_run
+        self._results = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._next_run = None
+        self._last_run = None
+        self._thread = None
+
+    def get(self, key):
+        with self._lock:
+            return self._results.get(key)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="forecast-precompute", daemon=True)
+            self._thread.start()
+        return self
+
+    # Ask the background thread to run immediately instead of waiting for run_at
+    def trigger(self):
+        self._wake.set()
+
+    # The first run starts immediately so a restarted server does not wait until run_at for payloads.
+    # Everything sits inside the try: an exception escaping here would end the thread for good.
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Forecast precompute run failed: {str(e)}")
+            try:
+                self._next_run = next_run_time(self.run_at, self.tz)
+                delay = (self._next_run - datetime.now(ZoneInfo(self.tz))).total_seconds()
+            except Exception as e:
+                logger.error(f"Could not schedule the next forecast precompute, retrying in an hour: {str(e)}")
+                delay = 3600
+            self._wake.wait(timeout=max(delay, 0))
+            self._wake.clear()
+
+    def run_once(self):
+        symbols = list(self.symbols() if callable(self.symbols) else self.symbols)
+        now = datetime.now(ZoneInfo(self.tz))
+        session = session_date(self.run_at, self.tz, now)
+        run = {
+            "started": now.isoformat(),
+            "session": session,
+            "symbols": len(symbols),
+            "succeeded": 0,
+            "failed": {},
+            "stage_seconds": {},
+            "symbol_seconds": {},
+        }
+        self._running = True
+        started = time.perf_counter()
+        try:
+            if self.before_run is not None:
+                stage_start = time.perf_counter()
+                self.before_run(symbols)
+                run["stage_seconds"]["refresh"] = round(time.perf_counter() - stage_start, 3)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._run_symbol, symbol, session): symbol for symbol in symbols}
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        results, timings, elapsed = future.result()
+                    except Exception as e:
+                        logger.warning(f"Precompute failed for {symbol}: {str(e)}")
+                        run["failed"][symbol] = str(e)
+                        continue
+                    with self._lock:
+                        self._results.update(results)
+                    run["succeeded"] += 1
+                    run["symbol_seconds"][symbol] = round(elapsed, 3)
+                    for stage, seconds in timings.items():
+                        run["stage_seconds"][stage] = round(run["stage_seconds"].get(stage, 0) + seconds, 3)
+        finally:
+            self._running = False
+            run["seconds"] = round(time.perf_counter() - started, 3)
+            self._last_run = run
+        logger.info(f"Precomputed forecasts for {run['succeeded']}/{len(symbols)} symbols in {run['seconds']}s")
+        return run
+
+    def _run_symbol(self, symbol, session):
+        started = time.perf_counter()
+        results, timings = self.task(symbol, session)
+        return results, timings, time.perf_counter() - started
+
+    def status(self):
+        with self._lock:
+            cached = len(self._results)
+        return {
+            "running": self._running,
+            "run_at": self.run_at,
+            "timezone": self.tz,
+            "max_workers": self.max_workers,
+            "next_run": self._next_run.isoformat() if self._next_run else None,
+            "cached_forecasts": cached,
+            "last_run": self._last_run,
+        }
@@ -0,0 +1,9 @@
+# Entry point for the Flask development server: python server.py
+#
+# Deliberately has no module-level imports. The forecast pool spawns its workers, and spawned workers
+# re-import the main module; with this file as __main__ they load only the forecasting code instead
+# of the whole web stack.
+if __name__ == "__main__":
+    import app
+
+    app.main()
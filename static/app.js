@@ -0,0 +1,47 @@
+// Theme toggle
+const themeToggle = document.getElementById('themeToggle');
+const body = document.body;
+if (localStorage.getItem('theme') === 'light') {
+    body.classList.remove('dark');
+    body.classList.add('light');
+    themeToggle.checked = true;
+}
+themeToggle.addEventListener('change', () => {
+    body.classList.toggle('dark');
+    body.classList.toggle('light');
+    localStorage.setItem('theme', body.classList.contains('light') ? 'light' : 'dark');
+    document.getElementById('stockForm').elements['theme'].value = body.classList.contains('light') ? 'light' : 'dark';
+});
+
+// Form validation and loading spinner
+const form = document.getElementById('stockForm');
+const tickerInput = document.getElementById('ticker');
+const submitBtn = document.getElementById('submitBtn');
+const spinner = document.getElementById('spinner');
+const periodType = document.getElementById('period_type');
+const periodDays = document.getElementById('period_days');
+const periodMonths = document.getElementById('period_months');
+const periodYears = document.getElementById('period_years');
+
+function togglePeriodInput() {
+    periodDays.style.display = periodType.value === 'days' ? 'block' : 'none';
+    periodMonths.style.display = periodType.value === 'months' ? 'block' : 'none';
+    periodYears.style.display = periodType.value === 'years' ? 'block' : 'none';
+}
+
+togglePeriodInput();
+
+tickerInput.addEventListener('input', () => {
+    tickerInput.classList.toggle('invalid', !tickerInput.value.trim());
+});
+
+form.addEventListener('submit', (e) => {
+    if (!tickerInput.value.trim()) {
+        e.preventDefault();
+        tickerInput.classList.add('invalid');
+        tickerInput.focus();
+    } else {
+        submitBtn.disabled = true;
+        spinner.style.display = 'block';
+    }
+});
@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+from flask import Response, abort
+
+import compression
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Fingerprinted URLs change whenever the file does, so browsers may keep them for a year
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+MIMETYPES = {".css": "text/css", ".js": "text/javascript"}
+
+
+# The stylesheet and scripts behind content-hashed URLs such as /assets/app.3f2a9c0d1e.css. Each file
+# is read and compressed once, at the maximum level, when the app starts; requests only pick the
+# encoding the client accepts.
+class StaticAssets:
+    def __init__(self, folder):
+        self.folder = folder
+        self._urls = {}
+        self._assets = {}
+        for name in sorted(os.listdir(folder)):
+            stem, ext = os.path.splitext(name)
+            if ext not in MIMETYPES:
+                continue
+            with open(os.path.join(folder, name), "rb") as f:
+                data = f.read()
+            fingerprinted = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+            encoded = {None: data}
+            for encoding in compression.supported_encodings():
+                encoded[encoding] = compression.compress(data, encoding, gzip_level=9, brotli_quality=11)
+            self._urls[name] = f"/assets/{fingerprinted}"
+            self._assets[fingerprinted] = (MIMETYPES[ext], encoded)
+
+    # Template helper: the current fingerprinted URL of a file in the static folder
+    def url(self, name):
+        return self._urls[name]
+
+    # Only the current fingerprint is served, so a stale URL can never be cached under new content
+    def response(self, fingerprinted):
+        if fingerprinted not in self._assets:
+            abort(404)
+        mimetype, encoded = self._assets[fingerprinted]
+        encoding = compression.choose_encoding()
+        response = Response(encoded[encoding], mimetype=mimetype)
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+
+STATIC_ASSETS = StaticAssets(STATIC_DIR)
@@ -0,0 +1,13 @@
+# List of popular Indian stocks for dropdowns, suggestions and batch jobs
+POPULAR_STOCKS = {
+    "Reliance Industries": "RELIANCE",
+    "Tata Consultancy Services": "TCS",
+    "Infosys": "INFY",
+    "HDFC Bank": "HDFCBANK",
+    "ICICI Bank": "ICICIBANK",
+    "Wipro": "WIPRO",
+    "Bharti Airtel": "BHARTIARTL",
+    "Asian Paints": "ASIANPAINT",
+    "Hindustan Unilever": "HINDUNILVR",
+    "Bajaj Finance": "BAJFINANCE"
+}
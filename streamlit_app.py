@@ -1,37 +1,30 @@
 import streamlit as st
-import yfinance as yf
-from prophet import Prophet
 import plotly.graph_objs as go
 import pandas as pd
 from datetime import date, timedelta
-import io
-import uuid
-import os
-import plotly.io as pio
 import numpy as np
 from ta.momentum import RSIIndicator
 from ta.trend import SMAIndicator
 import logging
+import market_data
+import warmup
+from chart_payload import trace_data
+from comparison import MAX_COMPARE, build_comparison_figure, run_comparison
+from engines import DEFAULT_ENGINE, ENGINES, get_engine, horizon_days, training_frame
+from export import EXPORT_FORMATS, export_bytes
+from image_renderer import IMAGE_RENDERER
+from price_cache import PRICE_CACHE
+from stocks import POPULAR_STOCKS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Temporary storage for forecast data
-FORECAST_STORAGE = {}
-
-# List of popular Indian stocks for dropdown
-POPULAR_STOCKS = {
-    "Reliance Industries": "RELIANCE",
-    "Tata Consultancy Services": "TCS",
-    "Infosys": "INFY",
-    "HDFC Bank": "HDFCBANK",
-    "ICICI Bank": "ICICIBANK",
-    "Wipro": "WIPRO",
-    "Bharti Airtel": "BHARTIARTL",
-    "Asian Paints": "ASIANPAINT",
-    "Hindustan Unilever": "HINDUNILVR",
-    "Bajaj Finance": "BAJFINANCE"
+# Interval calculation choices, fastest first
+INTERVAL_MODE_LABELS = {
+    "Fast (approximate)": "analytic",
+    "Reduced sampling": "reduced",
+    "Full sampling (slowest)": "sampled"
 }
 
 # Streamlit page configuration
@@ -111,11 +104,17 @@ h1, h2, h3, h4, h5, h6 {
 # Title
 st.title("StockPulse: Advanced Stock Forecasting")
 
-# Cache yfinance data
-@st.cache_data(ttl=3600)
-def fetch_stock_data(ticker, start_date, end_date):
+# Warm the price cache for the dropdown universe once per server process
+@st.cache_resource
+def start_price_warmup():
+    return warmup.start_schedule(POPULAR_STOCKS)
+
+start_price_warmup()
+
+# Cache price history per ticker; the start date is applied as a slice of the widest cached range
+def fetch_stock_data(ticker, start_date):
     try:
-        data = yf.download(ticker, start=start_date, end=end_date, progress=False)
+        data = PRICE_CACHE.get(ticker, start_date)
         return data if not data.empty else None
     except Exception as e:
         logger.error(f"Error fetching data for {ticker}: {str(e)}")
@@ -124,8 +123,7 @@ def fetch_stock_data(ticker, start_date, end_date):
 @st.cache_data(ttl=3600)
 def fetch_stock_info(ticker):
     try:
-        stock = yf.Ticker(ticker)
-        return stock.info, stock.quarterly_financials
+        return market_data.PROVIDER.info(ticker), market_data.PROVIDER.quarterly_financials(ticker)
     except Exception as e:
         logger.error(f"Error fetching info for {ticker}: {str(e)}")
         return None, None
@@ -142,6 +140,8 @@ with st.form(key="stock_form"):
         if ticker1 and ticker1.strip():
             if '.' not in ticker1 and not any(ticker1.lower() in s.lower() for s in POPULAR_STOCKS.values()):
                 st.warning("Invalid ticker. Try a popular stock or ensure correct format (e.g., RELIANCE or AAPL).")
+        compare_select = st.multiselect(f"Compare With (optional, up to {MAX_COMPARE - 1})", list(POPULAR_STOCKS.keys()), key="compare")
+        compare_text = st.text_input("Other Symbols to Compare (comma-separated)", "")
     with col2:
         period_type = st.selectbox("Prediction Period", ["Days", "Months", "Years"])
         if period_type == "Days":
@@ -162,6 +162,11 @@ with st.form(key="stock_form"):
         show_ma = st.checkbox("Show 50-day Moving Average", value=False)
         show_rsi = st.checkbox("Show RSI", value=False)
         confidence_level = st.slider("Forecast Confidence Interval (%)", 50, 95, 80, step=5)
+        interval_mode_label = st.selectbox("Interval Calculation", list(INTERVAL_MODE_LABELS.keys()), index=0)
+        interval_mode = INTERVAL_MODE_LABELS[interval_mode_label]
+        engine_label = st.selectbox("Forecast Engine", [e.label for e in ENGINES.values()],
+                                    index=list(ENGINES).index(DEFAULT_ENGINE))
+        engine = next(name for name, e in ENGINES.items() if e.label == engine_label)
     
     submit_button = st.form_submit_button("Generate Forecast")
 
@@ -274,7 +279,7 @@ def analyze_stock(stock_info, historical_data, financials):
         }
 
 # Function to generate forecast and plot
-def generate_forecast(ticker, period_type, period_value, start_date, confidence_level):
+def generate_forecast(ticker, period_type, period_value, start_date, confidence_level, interval_mode="analytic", engine=DEFAULT_ENGINE):
     if not ticker:
         return None, None, None, None, None
     
@@ -285,9 +290,8 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
     stock_info = {'ticker': ticker}
     
     try:
-        end_date = date.today().strftime("%Y-%m-%d")
         start_date_str = start_date.strftime("%Y-%m-%d")
-        data = fetch_stock_data(ticker, start_date_str, end_date)
+        data = fetch_stock_data(ticker, start_date_str)
         if data is None or len(data) < 2:
             raise ValueError(f"No or insufficient data found for stock symbol {ticker}")
         
@@ -308,44 +312,35 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
         return None, f"Error loading data for symbol {ticker}: {str(e)}", None, None, None
     
     try:
-        if period_type == "Days":
-            period = period_value
-            if not 1 <= period <= 90:
-                raise ValueError("Days must be between 1 and 90.")
-        elif period_type == "Months":
-            period = period_value * 30
-        else:  # Years
-            period = period_value * 365
+        if period_type == "Days" and not 1 <= period_value <= 90:
+            raise ValueError("Days must be between 1 and 90.")
+        period = horizon_days(period_type, period_value)
     except ValueError as e:
         return None, f"Invalid period value: {str(e)}", None, None, None
     
-    df_train = data[['Close']].reset_index()
-    df_train.columns = ["ds", "y"]
-    df_train['y'] = pd.to_numeric(df_train['y'], errors='coerce')
-    df_train = df_train.dropna(subset=['y'])
+    df_train = training_frame(data)
     
     if df_train.shape[0] < 2:
         return None, "Not enough data to generate a forecast.", None, None, None
     
     try:
-        m = Prophet(interval_width=confidence_level/100.0)
-        m.fit(df_train)
-        future = m.make_future_dataframe(periods=period)
-        forecast = m.predict(future)
+        forecast, _ = get_engine(engine).forecast(ticker, df_train, period, confidence_level/100.0, interval_mode)
         
         forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
         forecast_data.columns = ['Date', 'Forecast', 'Lower Bound', 'Upper Bound']
         
-        forecast_id = str(uuid.uuid4())
-        FORECAST_STORAGE[forecast_id] = forecast_data
-        
         sma, rsi = calculate_technicals(data)
         
+        # Downsample every trace to the chart's pixel width before it is sent to the browser
+        history_x, (history_y,) = trace_data(df_train['ds'], df_train['y'])
+        forecast_x, (yhat, yhat_upper, yhat_lower) = trace_data(
+            forecast['ds'], forecast['yhat'], forecast['yhat_upper'], forecast['yhat_lower'])
+        
         fig = go.Figure()
         
         if show_historical:
             fig.add_trace(go.Scatter(
-                x=df_train['ds'], y=df_train['y'],
+                x=history_x, y=history_y,
                 mode='lines', name='Historical',
                 line=dict(color='#3b82f6'),
                 hovertemplate='%{y:.2f}<br>%{x|%Y-%m-%d}',
@@ -354,7 +349,7 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
         
         if show_forecast:
             fig.add_trace(go.Scatter(
-                x=forecast['ds'], y=forecast['yhat'],
+                x=forecast_x, y=yhat,
                 mode='lines', name='Forecast',
                 line=dict(color='#60a5fa', dash='solid'),
                 hovertemplate='%{y:.2f}<br>%{x|%Y-%m-%d}',
@@ -363,7 +358,7 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
         
         if show_bounds and show_forecast:
             fig.add_trace(go.Scatter(
-                x=forecast['ds'], y=forecast['yhat_upper'],
+                x=forecast_x, y=yhat_upper,
                 mode='lines', name='Upper Bound',
                 line=dict(width=0),
                 showlegend=False,
@@ -371,7 +366,7 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
                 yaxis='y2'
             ))
             fig.add_trace(go.Scatter(
-                x=forecast['ds'], y=forecast['yhat_lower'],
+                x=forecast_x, y=yhat_lower,
                 mode='lines', name='Lower Bound',
                 line=dict(width=0),
                 fill='tonexty',
@@ -382,8 +377,9 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
             ))
         
         if show_ma and sma is not None:
+            sma_x, (sma_y,) = trace_data(data.index, sma)
             fig.add_trace(go.Scatter(
-                x=data.index, y=sma,
+                x=sma_x, y=sma_y,
                 mode='lines', name='50-day MA',
                 line=dict(color='#facc15', width=1.5),
                 hovertemplate='MA: %{y:.2f}<br>%{x|%Y-%m-%d}',
@@ -391,8 +387,9 @@ def generate_forecast(ticker, period_type, period_value, start_date, confidence_
             ))
         
         if show_rsi and rsi is not None:
+            rsi_x, (rsi_y,) = trace_data(data.index, rsi)
             fig.add_trace(go.Scatter(
-                x=data.index, y=rsi,
+                x=rsi_x, y=rsi_y,
                 mode='lines', name='RSI (14)',
                 line=dict(color='#ec4899', width=1.5),
                 hovertemplate='RSI: %{y:.2f}<br>%{x|%Y-%m-%d}',
@@ -534,14 +531,69 @@ def generate_profit_per_month_plot(stock_info, financials):
         logger.warning(f"Error generating profit per month plot: {str(e)}")
         return None
 
+# One button per export format. Data is a callable, so a file is only serialized when its button
+# is clicked, and on_click="ignore" keeps the page from rerunning.
+def download_buttons(label, frame, base_name, index=False):
+    columns = st.columns(len(EXPORT_FORMATS))
+    for column, (fmt, (mime, extension)) in zip(columns, EXPORT_FORMATS.items()):
+        with column:
+            st.download_button(
+                label=f"{label} ({fmt.upper()})",
+                data=lambda fmt=fmt: export_bytes(frame.reset_index() if index else frame, fmt),
+                file_name=f"{base_name}.{extension}",
+                mime=mime,
+                on_click="ignore",
+                key=f"download_{base_name}_{fmt}"
+            )
+
+# Symbols for comparison mode: the main ticker first, then the extra selections, de-duplicated
+def comparison_tickers(ticker, selected_names, extra_symbols):
+    symbols = [ticker] + [POPULAR_STOCKS[name] for name in selected_names]
+    symbols += [s for s in extra_symbols.split(",") if s.strip()]
+    return list(dict.fromkeys(warmup.to_symbol(s) for s in symbols if s and s.strip()))
+
+# Function to show the comparison chart, per-ticker timings and saved image
+def show_comparison(results, errors, wall_seconds, period_value, period_type):
+    st.subheader("Comparison")
+    for ticker, error in errors.items():
+        st.warning(f"Comparison forecast failed for {ticker}: {error}")
+    if len(results) < 2:
+        st.warning("At least two tickers are needed for a comparison chart.")
+        return
+
+    names = [r["ticker"].replace('.NS', '') for r in results]
+    fig = build_comparison_figure(results, f"{' vs '.join(names)} Forecast for {period_value} {period_type}", show_bounds)
+    st.plotly_chart(fig, use_container_width=True, key="comparison_chart")
+
+    timings = pd.DataFrame([{"Ticker": r["ticker"], **{k.capitalize() + " (s)": round(v, 2) for k, v in r["timings"].items()}} for r in results])
+    slowest = max(sum(r["timings"].values()) for r in results)
+    st.caption(f"Ran {len(results)} pipelines concurrently in {wall_seconds:.1f}s (slowest single ticker {slowest:.1f}s)")
+    st.dataframe(timings)
+
+    try:
+        image_name = IMAGE_RENDERER.submit(fig, '_vs_'.join(names))
+        st.write(f"Graph saving in the background as {image_name}")
+    except Exception as e:
+        st.warning(f"Error saving image: {str(e)}")
+
 # Process form submission
 if submit_button:
     if not ticker1:
         st.error("Please enter or select a stock symbol.")
     else:
         with st.spinner("Generating forecast..."):
+            comparison = None
+            compare_list = comparison_tickers(ticker1, compare_select, compare_text)
+            if len(compare_list) > MAX_COMPARE:
+                st.warning(f"Comparing only the first {MAX_COMPARE} tickers.")
+                compare_list = compare_list[:MAX_COMPARE]
+            if len(compare_list) >= 2:
+                # Runs first so the main forecast below reuses the cached prices and model
+                period_days = horizon_days(period_type, period_value)
+                comparison = run_comparison(compare_list, start_date, period_days, confidence_level / 100.0, interval_mode, engine)
+
             stock_info1, error1, forecast_data1, fig1, historical_data1, financials1 = generate_forecast(
-                ticker1, period_type, period_value, start_date, confidence_level
+                ticker1, period_type, period_value, start_date, confidence_level, interval_mode, engine
             )
             
             if error1:
@@ -586,40 +638,21 @@ if submit_button:
                     st.button("Reset Chart Zoom", on_click=lambda: st.session_state.update({"forecast_chart": {}}))
                 
                 try:
-                    folder = "pridiction of the stock"
-                    os.makedirs(folder, exist_ok=True)
-                    image_name = f"{date.today().strftime('%Y-%m-%d')}_{stock_info1['ticker'].replace('.NS', '')}.png"
-                    image_path = os.path.join(folder, image_name)
-                    pio.write_image(fig1, file=image_path, format='png', width=1200, height=600)
-                    st.write(f"Graph saved as {image_name}")
+                    image_name = IMAGE_RENDERER.submit(fig1, stock_info1['ticker'])
+                    st.write(f"Graph saving in the background as {image_name}")
                 except Exception as e:
                     st.warning(f"Error saving image: {str(e)}")
                 
                 if forecast_data1 is not None:
-                    buffer = io.StringIO()
-                    forecast_data1.to_csv(buffer, index=False)
-                    buffer.seek(0)
-                    st.download_button(
-                        label="Download Forecast (CSV)",
-                        data=buffer.getvalue(),
-                        file_name=f"{stock_info1['ticker']}_forecast.csv",
-                        mime="text/csv"
-                    )
-                    if FORECAST_STORAGE:
-                        FORECAST_STORAGE.pop(list(FORECAST_STORAGE.keys())[0], None)
+                    download_buttons("Download Forecast", forecast_data1, f"{stock_info1['ticker']}_forecast")
+                
+                if comparison is not None:
+                    show_comparison(*comparison, period_value, period_type)
                 
                 st.subheader("Historical Data")
                 if historical_data1 is not None:
                     st.dataframe(historical_data1[['Open', 'High', 'Low', 'Close', 'Volume']].tail(10))
-                    buffer = io.StringIO()
-                    historical_data1.to_csv(buffer)
-                    buffer.seek(0)
-                    st.download_button(
-                        label="Download Historical Data (CSV)",
-                        data=buffer.getvalue(),
-                        file_name=f"{stock_info1['ticker']}_historical.csv",
-                        mime="text/csv"
-                    )
+                    download_buttons("Download Historical Data", historical_data1, f"{stock_info1['ticker']}_historical", index=True)
                 else:
                     st.warning("Historical data unavailable.")
                 
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_payload import downsample_index, lttb, max_points
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=float), np.cumsum(rng.normal(size=n))
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 100), (1000, 3), (101, 100), (5000, 1200)])
+def test_lttb_point_budget_and_endpoints(n, threshold):
+    x, y = series(n)
+    index = lttb(x, y, threshold)
+    assert len(index) == threshold
+    assert index[0] == 0 and index[-1] == n - 1
+    assert (np.diff(index) > 0).all()
+
+
+def test_lttb_keeps_everything_under_the_budget():
+    x, y = series(50)
+    assert (lttb(x, y, 50) == np.arange(50)).all()
+    assert (lttb(x, y, 500) == np.arange(50)).all()
+
+
+def test_lttb_keeps_a_spike():
+    x, y = series(1000)
+    y[437] = 1000.0
+    assert 437 in lttb(x, y, 50)
+
+
+def test_downsample_index_respects_max_points():
+    ds = pd.date_range("2000-01-01", periods=5000, freq="D")
+    _, y = series(5000)
+    index = downsample_index(ds, y, width_px=300)
+    assert len(index) == max_points(300)
+    assert index[0] == 0 and index[-1] == 4999
+
+
+def test_downsample_index_skips_nans():
+    ds = pd.date_range("2000-01-01", periods=5000, freq="D")
+    _, y = series(5000)
+    y[:100] = np.nan
+    y[-10:] = np.nan
+    index = downsample_index(ds, y, width_px=300)
+    assert not np.isnan(y[index]).any()
+    assert index[0] == 100 and index[-1] == 4989
+
+
+def test_downsample_index_short_series_is_untouched():
+    ds = pd.date_range("2000-01-01", periods=10, freq="D")
+    y = np.arange(10, dtype=float)
+    y[3] = np.nan
+    assert list(downsample_index(ds, y)) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
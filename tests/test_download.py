@@ -0,0 +1,43 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from app import app
+from forecast_store import FORECAST_DATA_COLUMNS, FORECAST_STORE, CompactForecast
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def stored_forecast(client, sid="test-session"):
+    dates = pd.date_range("2024-01-01", periods=10, freq="D")
+    values = np.linspace(100.0, 110.0, 10)
+    data = pd.DataFrame(dict(zip(FORECAST_DATA_COLUMNS, (dates, values, values - 1, values + 1))))
+    with client.session_transaction() as session:
+        session["sid"] = sid
+    return FORECAST_STORE.put(CompactForecast.from_frame(data), sid)
+
+
+# The page offers every format for one forecast id, so one download must not use it up
+def test_download_several_formats_of_one_forecast(client):
+    forecast_id = stored_forecast(client)
+    csv = client.get(f"/download?ticker=TEST&forecast_id={forecast_id}")
+    assert csv.status_code == 200
+    assert csv.data.decode().splitlines()[0] == ",".join(FORECAST_DATA_COLUMNS)
+    parquet = client.get(f"/download?ticker=TEST&forecast_id={forecast_id}&format=parquet")
+    assert parquet.status_code == 200
+    assert len(pq.read_table(io.BytesIO(parquet.data))) == 10
+
+
+def test_download_needs_the_owning_session(client):
+    forecast_id = stored_forecast(client)
+    with client.session_transaction() as session:
+        session["sid"] = "someone-else"
+    assert client.get(f"/download?forecast_id={forecast_id}").status_code == 400
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from export import export_bytes, iter_export
+from forecast_store import FORECAST_DATA_COLUMNS, CompactForecast
+
+
+def forecast_data(values):
+    dates = pd.date_range("2024-01-01", periods=len(values), freq="D")
+    values = np.asarray(values)
+    return pd.DataFrame(dict(zip(FORECAST_DATA_COLUMNS, (dates, values, values - 1, values + 1))))
+
+
+# float32 values come out at the shortest digits that read back as the same float32
+def test_json_row_text():
+    stored = CompactForecast.from_frame(forecast_data([16.028933]))
+    assert export_bytes(stored, "json").decode() == (
+        '{"columns":["Date","Forecast","Lower Bound","Upper Bound"],'
+        '"data":[["2024-01-01",16.028933,15.028933,17.028933]]}'
+    )
+
+
+def test_json_round_trips_float32_and_chunks():
+    values = np.random.default_rng(0).uniform(10, 5000, 12).astype(np.float32)
+    stored = CompactForecast.from_frame(forecast_data(values))
+    body = json.loads(b"".join(iter_export(stored, "json", chunk_rows=5)))
+    assert len(body["data"]) == 12
+    assert np.array_equal(np.array([row[1] for row in body["data"]], dtype=np.float32), values)
+
+
+def test_json_nan_is_null():
+    body = json.loads(export_bytes(forecast_data([1.5, np.nan]), "json"))
+    assert body["data"][1][1:] == [None, None, None]
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from forecast_store import FORECAST_DATA_COLUMNS, CompactForecast, ForecastStore
+
+TTL = 60
+
+
+# Time source the tests move by hand
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_store(max_entries=10, max_bytes=10 ** 9, max_per_session=10, clock=None):
+    return ForecastStore(max_entries, max_bytes, TTL, max_per_session, clock=clock or FakeClock())
+
+
+def forecast_data(days=30):
+    dates = pd.date_range("2024-01-01", periods=days, freq="D")
+    values = np.linspace(100.0, 130.0, days)
+    return pd.DataFrame(dict(zip(FORECAST_DATA_COLUMNS, (dates, values, values - 5, values + 5))))
+
+
+def nbytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def test_lru_eviction_by_entry_count():
+    store = make_store(max_entries=3)
+    a, b, c = (store.put(name) for name in "abc")
+    # Reading `a` makes `b` the least recently used
+    assert store.get(a) == "a"
+    d = store.put("d")
+    assert store.get(b) is None
+    assert [store.get(i) for i in (a, c, d)] == ["a", "c", "d"]
+    assert store.stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    value = forecast_data()
+    store = make_store(max_bytes=nbytes(value) * 2)
+    first = store.put(value)
+    second = store.put(value)
+    third = store.put(value)
+    assert store.get(first) is None
+    assert store.get(second) is value and store.get(third) is value
+    assert store.stats()["bytes"] == nbytes(value) * 2
+
+
+def test_value_over_budget_is_not_stored():
+    value = forecast_data()
+    store = make_store(max_bytes=nbytes(value) - 1)
+    assert store.get(store.put(value)) is None
+    assert store.stats()["entries"] == 0
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    store = make_store(clock=clock)
+    stale = store.put("stale")
+    clock.advance(TTL / 2)
+    fresh = store.put("fresh")
+    clock.advance(TTL / 2)
+    assert store.get(stale) is None
+    assert store.get(fresh) == "fresh"
+    assert store.stats()["expirations"] == 1
+
+
+def test_read_renews_ttl():
+    clock = FakeClock()
+    store = make_store(clock=clock)
+    forecast_id = store.put("value")
+    clock.advance(TTL - 1)
+    assert store.get(forecast_id) == "value"
+    clock.advance(TTL - 1)
+    assert store.get(forecast_id) == "value"
+    clock.advance(TTL)
+    assert store.get(forecast_id) is None
+
+
+def test_expired_entries_are_dropped_on_put():
+    clock = FakeClock()
+    store = make_store(clock=clock)
+    store.put("old")
+    clock.advance(TTL)
+    store.put("new")
+    assert store.stats()["entries"] == 1
+
+
+def test_sessions_are_isolated():
+    store = make_store()
+    owned = store.put("mine", session="alice")
+    shared = store.put("link")
+    assert store.get(owned, session="alice") == "mine"
+    assert store.get(owned, session="bob") is None
+    assert store.get(owned) is None
+    assert store.get(shared, session="bob") == "link"
+
+
+def test_session_cap_only_evicts_own_entries():
+    store = make_store(max_per_session=2)
+    other = store.put("other", session="bob")
+    first = store.put(1, session="alice")
+    second = store.put(2, session="alice")
+    third = store.put(3, session="alice")
+    assert store.get(first, session="alice") is None
+    assert store.get(second, session="alice") == 2
+    assert store.get(third, session="alice") == 3
+    assert store.get(other, session="bob") == "other"
+
+
+def test_pop_removes_entry():
+    store = make_store()
+    forecast_id = store.put("value", session="alice")
+    assert store.pop(forecast_id, session="bob") is None
+    assert store.pop(forecast_id, session="alice") == "value"
+    assert store.get(forecast_id, session="alice") is None
+    assert store.stats()["entries"] == 0 and store.stats()["sessions"] == 0
+
+
+def test_compact_forecast_round_trip():
+    data = forecast_data()
+    compact = CompactForecast.from_frame(data)
+    assert len(compact) == len(data)
+    frame = compact.to_frame()
+    assert list(frame.columns) == FORECAST_DATA_COLUMNS
+    assert (frame["Date"].values == data["Date"].values).all()
+    for column in FORECAST_DATA_COLUMNS[1:]:
+        np.testing.assert_allclose(frame[column].values, data[column].values, rtol=1e-6)
+    assert len(compact.to_frame(5, 10)) == 5
+
+
+def test_compact_forecast_is_smaller_than_the_frame():
+    data = forecast_data(365)
+    assert CompactForecast.from_frame(data).nbytes < nbytes(data)
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+CALLERS = 8
+
+
+# Runs `fn` under one key from CALLERS threads at once, once all of them have joined the flight
+def run_concurrently(flight, fn):
+    started = threading.Event()
+    release = threading.Event()
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call():
+        return flight.do("key", leader_fn)
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(call)]
+        started.wait(5)
+        futures += [pool.submit(call) for _ in range(CALLERS - 1)]
+        # Every follower has registered once the shared counter reaches them all
+        while flight.stats()["shared"] < CALLERS - 1:
+            threading.Event().wait(0.001)
+        release.set()
+        return [f.exception(5) or f.result() for f in futures]
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return object()
+
+    results = run_concurrently(flight, fn)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": CALLERS - 1}
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight()
+    error = ValueError("download failed")
+
+    def fn():
+        raise error
+
+    results = run_concurrently(flight, fn)
+    assert all(result is error for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_key_is_released_after_a_failure():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 42) == 42
+    assert flight.stats()["executed"] == 2
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats() == {"in_flight": 0, "executed": 2, "shared": 0}
@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+from datetime import date
+
+import market_data
+import price_store
+from price_cache import PRICE_CACHE
+
+logger = logging.getLogger(__name__)
+
+# Optional newline-separated list of extra symbols to warm alongside POPULAR_STOCKS
+UNIVERSE_FILE = os.environ.get("UNIVERSE_FILE", "")
+WARMUP_INTERVAL_MINUTES = float(os.environ.get("WARMUP_INTERVAL_MINUTES", "60"))
+WARMUP_BATCH_SIZE = int(os.environ.get("WARMUP_BATCH_SIZE", "50"))
+
+
+def to_symbol(ticker):
+    ticker = ticker.strip().upper()
+    return ticker if '.' in ticker else f"{ticker}.NS"
+
+
+# Read symbols from a universe file, ignoring blank lines and # comments
+def read_universe_file(path):
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                symbols.append(to_symbol(line))
+    return symbols
+
+
+# POPULAR_STOCKS symbols plus the optional universe file, de-duplicated in order
+def load_universe(popular_stocks, universe_file=UNIVERSE_FILE):
+    symbols = [to_symbol(s) for s in popular_stocks.values()]
+    if universe_file:
+        try:
+            symbols += read_universe_file(universe_file)
+        except OSError as e:
+            logger.warning(f"Could not read universe file {universe_file}: {str(e)}")
+    return list(dict.fromkeys(symbols))
+
+
+# Multi-ticker provider downloads of symbols from start, WARMUP_BATCH_SIZE symbols per call
+def _download_batches(symbols, start, end):
+    for i in range(0, len(symbols), WARMUP_BATCH_SIZE):
+        batch = symbols[i:i + WARMUP_BATCH_SIZE]
+        try:
+            yield batch, market_data.PROVIDER.history(batch, start, end)
+        except Exception as e:
+            logger.error(f"Warm-up batch download failed: {str(e)}")
+
+
+# Load the universe into the store and price cache in a few multi-ticker calls. Symbols with no stored
+# history (or stored from a later start) are fetched from start. The rest are delta-synced together
+# from the earliest last stored bar among them, so a warm store costs one call per batch rather than
+# one per symbol; the price cache then reads them from the store without touching the provider.
+def warm_up(symbols, start=price_store.DEFAULT_START):
+    end = date.today().strftime("%Y-%m-%d")
+    cold = [symbol for symbol in symbols if price_store.needs_full_sync(symbol, start)]
+    for batch, frames in _download_batches(cold, start, end):
+        for symbol, frame in frames.items():
+            price_store.put_history(symbol, frame, start)
+
+    due = {}
+    for symbol in symbols:
+        if symbol not in cold:
+            last = price_store.delta_start(symbol, start)
+            if last is not None:
+                due[symbol] = last
+    if due:
+        for batch, frames in _download_batches(list(due), min(due.values()), end):
+            for symbol in batch:
+                price_store.put_delta(symbol, frames.get(symbol))
+
+    loaded = 0
+    for symbol in symbols:
+        try:
+            if not PRICE_CACHE.get(symbol, start=start).empty:
+                loaded += 1
+        except Exception as e:
+            logger.warning(f"Warm-up failed for {symbol}: {str(e)}")
+    logger.info(f"Warm-up loaded {loaded} of {len(symbols)} symbols "
+                f"({len(cold)} fetched in full, {len(due)} delta-synced in batches)")
+    return loaded
+
+
+# Run warm_up now in the background and then every interval_minutes
+def start_schedule(popular_stocks, interval_minutes=WARMUP_INTERVAL_MINUTES, universe_file=UNIVERSE_FILE):
+    def run():
+        try:
+            warm_up(load_universe(popular_stocks, universe_file))
+        except Exception as e:
+            logger.error(f"Warm-up failed: {str(e)}")
+        if interval_minutes > 0:
+            timer = threading.Timer(interval_minutes * 60, run)
+            timer.daemon = True
+            timer.start()
+
+    thread = threading.Thread(target=run, name="price-warmup", daemon=True)
+    thread.start()
+    return thread